@@ -4,45 +4,93 @@ Renin Product Image Scraper
 Comprehensive tool for extracting product images from renin.com
 
 Usage:
-    python renin-image-scraper.py
+    python renin-image-scraper.py                          # download, first 5 products
+    python renin-image-scraper.py download --limit 0 --preflight --min-width 400 --formats jpeg,png,webp
+    python renin-image-scraper.py sitemap --category mirrors
+    python renin-image-scraper.py extract --lean-browser https://www.renin.com/us/barn-doors/augusta/
+    python renin-image-scraper.py metadata                 # rebuild the CSV from the files on disk
+    python renin-image-scraper.py summary
+    python renin-image-scraper.py check-startup            # quick commands must not load heavy modules
+
+Selenium, PIL, requests and BeautifulSoup are imported only by the code that
+uses them, so sitemap, metadata and summary start without loading them.
 
 Features:
 - Scrapes all product pages from sitemap
 - Downloads high-quality product images
+- Optionally checks each image's size and format from its first few KB
+  (HTTP Range) and skips icons and placeholders before downloading them
+- Optional lean browser mode: eager page loads, third-party/font/video/image
+  requests blocked through DevTools, one browser for all pages, and a wait
+  that ends when the gallery markup is there
 - Organizes images by category
+- Reuses images any Renin scraper already saved (scripts/image_index.py)
+- Optional disk budget: least recently used size variants are evicted,
+  originals are kept (scripts/disk_cache.py)
 - Generates metadata CSV
 - Respects rate limits and robots.txt
 """
 
 import os
+import sys
 import time
 import hashlib
-import requests
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import csv
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional
 import logging
-
-# Third-party imports (install with: pip install selenium beautifulsoup4 pillow)
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from PIL import Image
 import io
 
+# Third-party modules (pip install selenium beautifulsoup4 pillow requests) are
+# imported where they are used; check-startup keeps them out of the quick commands
+HEAVY_MODULES = ('selenium', 'PIL', 'requests', 'bs4', 'numpy')
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from disk_cache import DiskCache, format_size, parse_size
+from image_index import INDEX_PATH, ImageIndex, requested_size
+from image_probe import MAX_BYTES, ImageInfo, image_dimensions, image_info, probe_remote_image
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+METADATA_FILE = "image_metadata.csv"
+METADATA_FIELDS = ['url', 'product_name', 'category', 'filename', 'local_path',
+                   'width', 'height', 'file_size_bytes']
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Lean browser mode: requests the gallery markup never needs, blocked by Chrome before they are sent
+BLOCKED_URL_PATTERNS = [
+    # Analytics, ads and tag managers
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googleadservices.com*',
+    '*connect.facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*', '*bat.bing.com*',
+    '*pinterest.com*', '*tiktok.com*', '*snapchat.com*', '*linkedin.com/px*',
+    # Chat and support widgets
+    '*intercom.io*', '*intercomcdn.com*', '*zdassets.com*', '*zopim.com*', '*tawk.to*',
+    '*livechatinc.com*', '*hs-scripts.com*', '*hubspot.com*', '*drift.com*',
+    # Fonts and video
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*', '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    '*youtube.com*', '*ytimg.com*', '*vimeo.com*', '*vimeocdn.com*', '*.mp4*', '*.webm*', '*.m3u8*',
+    # Images: gallery URLs are read from the markup, the pixels are never needed
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+]
+GALLERY_WAIT = 10  # seconds
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 @dataclass
 class ProductImage:
-    """Data class for product image information"""
+    """Data class for product image information
+
+    Slotted: 88 bytes per record instead of ~350 with a per-instance __dict__
+    (CPython 3.11, field values not included).
+    """
+    __slots__ = ('url', 'product_name', 'category', 'filename', 'local_path', 'size', 'file_size')
+
     url: str
     product_name: str
     category: str
@@ -51,8 +99,129 @@ class ProductImage:
     size: tuple
     file_size: int
 
+
+def parse_sitemap(xml_content: bytes) -> List[Dict[str, str]]:
+    """Product URL, category and name for every <loc> in a product sitemap"""
+    root = ET.fromstring(xml_content)
+    namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+    products = []
+    for url_element in root.findall('ns:url', namespace):
+        loc = url_element.find('ns:loc', namespace)
+        if loc is not None:
+            product_url = loc.text
+
+            # Categorize based on URL path
+            category = "other"
+            if "/barn-doors/" in product_url:
+                category = "barn-doors"
+            elif "/closet-doors/" in product_url:
+                category = "closet-doors"
+            elif "/mirrors/" in product_url:
+                category = "mirrors"
+            elif "/hardware/" in product_url:
+                category = "hardware"
+
+            # Extract product name from URL
+            product_name = product_url.rstrip('/').split('/')[-1].replace('-', ' ').title()
+
+            products.append({
+                'url': product_url,
+                'category': category,
+                'name': product_name
+            })
+    return products
+
+
+def fetch_sitemap(base_url: str) -> List[Dict[str, str]]:
+    """parse_sitemap() of base_url's product sitemap, fetched with urllib (no requests import)"""
+    from urllib.request import Request, urlopen
+
+    with urlopen(Request(f"{base_url}/product-sitemap.xml", headers={'User-Agent': USER_AGENT}),
+                 timeout=30) as response:
+        return parse_sitemap(response.read())
+
+
+def write_metadata(images: List[ProductImage], metadata_file: Path):
+    tmp_path = metadata_file.with_suffix('.tmp')
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=METADATA_FIELDS)
+
+        writer.writeheader()
+        for img in images:
+            writer.writerow({
+                'url': img.url,
+                'product_name': img.product_name,
+                'category': img.category,
+                'filename': img.filename,
+                'local_path': img.local_path,
+                'width': img.size[0],
+                'height': img.size[1],
+                'file_size_bytes': img.file_size
+            })
+    tmp_path.replace(metadata_file)
+
+
+def load_metadata(metadata_file: Path) -> List[ProductImage]:
+    """ProductImages from a metadata CSV (empty if there is none yet)"""
+    if not metadata_file.exists():
+        return []
+    with open(metadata_file, newline='', encoding='utf-8') as csvfile:
+        return [
+            ProductImage(url=row['url'], product_name=row['product_name'], category=row['category'],
+                         filename=row['filename'], local_path=row['local_path'],
+                         size=(int(row['width'] or 0), int(row['height'] or 0)),
+                         file_size=int(row['file_size_bytes'] or 0))
+            for row in csv.DictReader(csvfile)
+        ]
+
+
+def scan_images(output_dir: Path, known: Dict[str, ProductImage]) -> List[ProductImage]:
+    """ProductImages for the files under output_dir's category folders, sized from their headers
+
+    URLs and product names come from known (by filename) where a previous
+    CSV had them; otherwise the name is read back from the filename.
+    """
+    images = []
+    for path in sorted(output_dir.glob('*/*')):
+        if path.suffix.lower() not in IMAGE_SUFFIXES or not path.is_file():
+            continue
+        with open(path, 'rb') as f:
+            size = image_dimensions(f.read(MAX_BYTES)) or (0, 0)
+        previous = known.get(path.name)
+        images.append(ProductImage(
+            url=previous.url if previous else '',
+            product_name=previous.product_name if previous else path.stem.rsplit('_', 1)[0].replace('_', ' '),
+            category=path.parent.name,
+            filename=path.name,
+            local_path=str(path),
+            size=size,
+            file_size=path.stat().st_size
+        ))
+    return images
+
+
+def print_summary(images: List[ProductImage], output_dir: Path):
+    """Print summary of downloaded images by category"""
+    category_counts = {}
+    for img in images:
+        category_counts[img.category] = category_counts.get(img.category, 0) + 1
+
+    print("\n" + "="*50)
+    print("DOWNLOAD SUMMARY")
+    print("="*50)
+    for category, count in category_counts.items():
+        print(f"{category.title()}: {count} images")
+    print(f"Total: {len(images)} images ({sum(img.file_size for img in images) / (1024 * 1024):.1f} MB)")
+    print(f"Storage location: {output_dir.absolute()}")
+    print("="*50)
+
+
 class ReninImageScraper:
-    def __init__(self, base_url="https://www.renin.com", output_dir="renin_images"):
+    def __init__(self, base_url="https://www.renin.com", output_dir="renin_images",
+                 preflight=False, min_width=0, min_height=0, allowed_formats=None,
+                 image_index: Optional[ImageIndex] = None, quality_gate: Optional[str] = None,
+                 lean_browser=False, cache_budget: Optional[int] = None):
         self.base_url = base_url
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
@@ -62,16 +231,39 @@ class ReninImageScraper:
         for category in self.categories:
             (self.output_dir / category).mkdir(exist_ok=True)
         
+        import requests
+
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.session.headers.update({'User-Agent': USER_AGENT})
         
         self.downloaded_images: List[ProductImage] = []
+        self.image_index = image_index if image_index is not None else ImageIndex()
+        self.reused_images = 0
         self.rate_limit_delay = 2  # seconds between requests
+
+        # Pre-flight: probe each image's header and skip it if too small or an unwanted type
+        self.preflight = preflight
+        self.min_width = min_width
+        self.min_height = min_height
+        self.allowed_formats = {'jpeg' if f == 'jpg' else f for f in allowed_formats} if allowed_formats else None
+        self.preflight_stats = {'skipped': 0, 'skipped_bytes': 0, 'probe_bytes': 0}
+
+        # After downloading: score images for blank/blurred/near-solid and 'tag' or 'quarantine' failures
+        self.quality_gate = quality_gate
+
+        # Lean browser: eager loads, blocked third-party/media requests, one Chrome reused for every page
+        self.lean_browser = lean_browser
+        self._browser = None
+        self.page_timings: List[float] = []  # Seconds per Selenium-rendered page
+
+        # Disk budget in bytes for output_dir: LRU eviction of size variants, originals pinned
+        self.disk_cache = DiskCache(self.output_dir, cache_budget) if cache_budget else None
         
-    def setup_selenium_driver(self, headless=True) -> webdriver.Chrome:
+    def setup_selenium_driver(self, headless=True) -> "webdriver.Chrome":
         """Setup Chrome WebDriver with optimized options"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         if headless:
             options.add_argument("--headless=new")
@@ -89,8 +281,27 @@ class ReninImageScraper:
             "profile.default_content_setting_values.notifications": 2
         }
         options.add_experimental_option("prefs", prefs)
-        
-        return webdriver.Chrome(options=options)
+        if self.lean_browser:
+            # get() returns at DOMContentLoaded instead of waiting for every subresource
+            options.page_load_strategy = 'eager'
+
+        driver = webdriver.Chrome(options=options)
+        if self.lean_browser:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        return driver
+
+    @property
+    def browser(self) -> "webdriver.Chrome":
+        """Lean mode's Chrome, started on first use and reused for every page"""
+        if self._browser is None:
+            self._browser = self.setup_selenium_driver()
+        return self._browser
+
+    def close_browser(self):
+        if self._browser is not None:
+            self._browser.quit()
+            self._browser = None
     
     def get_product_urls_from_sitemap(self) -> List[Dict[str, str]]:
         """Extract all product URLs from the sitemap"""
@@ -100,35 +311,7 @@ class ReninImageScraper:
             response = self.session.get(sitemap_url)
             response.raise_for_status()
             
-            root = ET.fromstring(response.content)
-            namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-            
-            products = []
-            for url_element in root.findall('ns:url', namespace):
-                loc = url_element.find('ns:loc', namespace)
-                if loc is not None:
-                    product_url = loc.text
-                    
-                    # Categorize based on URL path
-                    category = "other"
-                    if "/barn-doors/" in product_url:
-                        category = "barn-doors"
-                    elif "/closet-doors/" in product_url:
-                        category = "closet-doors"
-                    elif "/mirrors/" in product_url:
-                        category = "mirrors"
-                    elif "/hardware/" in product_url:
-                        category = "hardware"
-                    
-                    # Extract product name from URL
-                    product_name = product_url.rstrip('/').split('/')[-1].replace('-', ' ').title()
-                    
-                    products.append({
-                        'url': product_url,
-                        'category': category,
-                        'name': product_name
-                    })
-            
+            products = parse_sitemap(response.content)
             logger.info(f"Found {len(products)} products in sitemap")
             return products
             
@@ -138,66 +321,91 @@ class ReninImageScraper:
     
     def extract_images_from_product_page(self, product_url: str, category: str, product_name: str) -> List[str]:
         """Extract all product images from a specific product page"""
-        driver = self.setup_selenium_driver()
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from renin_extract import GALLERY_SELECTORS, extract_gallery_images
+
+        driver = self.browser if self.lean_browser else self.setup_selenium_driver()
         image_urls = []
         
         try:
             logger.info(f"Scraping images from: {product_url}")
+            start = time.perf_counter()
             driver.get(product_url)
+            loaded = time.perf_counter()
             
-            # Wait for page to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Get page source and parse with BeautifulSoup
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # Target specific image containers for Renin's WooCommerce setup
-            selectors = [
-                '.woocommerce-product-gallery img',  # Main product gallery
-                '.product-images img',               # Alternative product images
-                '.flex-viewport img',                # FlexSlider images
-                'img[src*="wp-content/uploads"]',    # WordPress uploads
-            ]
-            
-            found_images = set()
-            
-            for selector in selectors:
-                images = soup.select(selector)
-                for img in images:
-                    # Get image URL from src or data-src (lazy loading)
-                    img_url = img.get('src') or img.get('data-src') or img.get('data-large_image')
-                    
-                    if img_url:
-                        # Handle relative URLs
-                        if img_url.startswith('//'):
-                            img_url = 'https:' + img_url
-                        elif img_url.startswith('/'):
-                            img_url = urljoin(self.base_url, img_url)
-                        
-                        # Filter for actual product images (high quality)
-                        if (img_url not in found_images and 
-                            'wp-content/uploads' in img_url and
-                            not any(exclude in img_url.lower() for exclude in ['thumbnail', '-100x100', '-150x150'])):
-                            found_images.add(img_url)
+            if self.lean_browser:
+                # Ready once the gallery markup is there; a page still without it at readyState
+                # 'complete' (everything slow is blocked) has none coming
+                gallery = ', '.join(GALLERY_SELECTORS)
+                WebDriverWait(driver, GALLERY_WAIT, poll_frequency=0.05).until(
+                    lambda d: d.find_elements(By.CSS_SELECTOR, gallery)
+                    or d.execute_script("return document.readyState") == "complete"
+                )
+            else:
+                # Wait for page to load
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+            ready = time.perf_counter()
             
-            image_urls = list(found_images)
-            logger.info(f"Found {len(image_urls)} images for {product_name}")
+            # Parse the rendered page with the shared gallery extractor
+            image_urls = extract_gallery_images(driver.page_source, self.base_url)
+            done = time.perf_counter()
+            self.page_timings.append(done - start)
+            logger.info(f"Found {len(image_urls)} images for {product_name} in {done - start:.2f}s "
+                        f"(load {loaded - start:.2f}s, wait {ready - loaded:.2f}s, parse {done - ready:.2f}s)")
             
         except Exception as e:
             logger.error(f"Error extracting images from {product_url}: {e}")
         
         finally:
-            driver.quit()
+            if not self.lean_browser:
+                driver.quit()
         
         return image_urls
     
+    def preflight_rejection(self, info: ImageInfo) -> Optional[str]:
+        """Why a probed image should be skipped, or None to download it"""
+        if self.allowed_formats and info.format not in self.allowed_formats:
+            return f"format {info.format or 'unrecognized'}"
+        if info.width is not None and (info.width < self.min_width or info.height < self.min_height):
+            return f"{info.width}x{info.height} is below {self.min_width}x{self.min_height}"
+        return None
+
     def download_image(self, image_url: str, product_name: str, category: str) -> Optional[ProductImage]:
         """Download a single image and return ProductImage object"""
+        from PIL import Image
+
         try:
-            response = self.session.get(image_url, timeout=30)
-            response.raise_for_status()
+            content = None
+            cached = self.image_index.lookup(image_url)
+            if cached is not None:
+                content = cached.read_bytes()
+                reason = self.preflight_rejection(image_info(content)) if self.preflight else None
+                if reason:
+                    logger.info(f"Skipped {image_url}: {reason}")
+                    return None
+                self.reused_images += 1
+            elif self.preflight:
+                # Images that pass come back complete, so there is no second download
+                info = probe_remote_image(self.session, image_url,
+                                          keep=lambda info: self.preflight_rejection(info) is None)
+                reason = self.preflight_rejection(info)
+                if reason:
+                    self.preflight_stats['skipped'] += 1
+                    self.preflight_stats['probe_bytes'] += len(info.data)
+                    self.preflight_stats['skipped_bytes'] += max((info.total_size or 0) - len(info.data), 0)
+                    logger.info(f"Skipped {image_url}: {reason}")
+                    return None
+                if info.complete:
+                    content = info.data
+
+            if content is None:
+                response = self.session.get(image_url, timeout=30)
+                response.raise_for_status()
+                content = response.content
             
             # Create unique filename
             url_hash = hashlib.md5(image_url.encode()).hexdigest()[:8]
@@ -216,8 +424,19 @@ class ReninImageScraper:
             local_path = self.output_dir / category / filename
             
             # Open image to verify and get metadata
-            img = Image.open(io.BytesIO(response.content))
-            img.save(local_path, optimize=True, quality=95)
+            img = Image.open(io.BytesIO(content))
+            # Replaced by rename, never rewritten in place: media_sync.py --link may share the inode with public/
+            part_path = local_path.with_name(f".{local_path.stem}.part{local_path.suffix}")
+            try:
+                img.save(part_path, optimize=True, quality=95)
+                part_path.replace(local_path)
+            finally:
+                part_path.unlink(missing_ok=True)
+            self.image_index.record(image_url, local_path)
+            if self.disk_cache:
+                if cached is not None:
+                    self.disk_cache.touch(cached)
+                self.disk_cache.record(local_path, pinned=requested_size(image_url) is None)
             
             # Create ProductImage object
             product_image = ProductImage(
@@ -227,38 +446,53 @@ class ReninImageScraper:
                 filename=filename,
                 local_path=str(local_path),
                 size=img.size,
-                file_size=len(response.content)
+                file_size=len(content)
             )
             
-            logger.info(f"Downloaded: {filename} ({img.size[0]}x{img.size[1]})")
+            logger.info(f"{'Reused' if cached else 'Downloaded'}: {filename} ({img.size[0]}x{img.size[1]})")
             return product_image
             
         except Exception as e:
             logger.error(f"Error downloading {image_url}: {e}")
             return None
     
+    def gate_quality(self):
+        """Score the downloaded images in one batch; quarantined failures leave the metadata"""
+        from image_quality import QUARANTINE_DIR, REPORT_FILE, gate_images
+
+        quarantine = self.quality_gate == 'quarantine'
+        total = len(self.downloaded_images)
+        failed = gate_images([img.local_path for img in self.downloaded_images], self.output_dir,
+                             quarantine=quarantine)
+        for score in failed:
+            logger.warning(f"Quality gate: {Path(score.path).name} is {', '.join(score.failures)}")
+        if quarantine:
+            rejected = {score.path for score in failed}
+            self.downloaded_images = [img for img in self.downloaded_images if img.local_path not in rejected]
+        moved = f", moved to {self.output_dir / QUARANTINE_DIR}" if quarantine and failed else ""
+        logger.info(f"Quality gate: {len(failed)} of {total} images failed{moved} "
+                    f"(scores in {self.output_dir / REPORT_FILE})")
+
+    def enforce_cache_budget(self):
+        """Evict least recently used unpinned images until output_dir fits the budget"""
+        evicted = self.disk_cache.enforce()
+        self.disk_cache.save()
+        # A budget smaller than this run's variants evicts some of them too
+        gone = {str(self.disk_cache.root / key) for key, _ in evicted}
+        self.downloaded_images = [img for img in self.downloaded_images
+                                  if str(Path(img.local_path).resolve()) not in gone]
+        files, total, pinned = self.disk_cache.usage()
+        logger.info(f"Disk cache: {files} files, {format_size(total)} ({format_size(pinned)} pinned originals) "
+                    f"of {format_size(self.disk_cache.budget)}"
+                    + (f"; evicted {len(evicted)} files, {format_size(sum(size for _, size in evicted))}"
+                       if evicted else ""))
+        if pinned > self.disk_cache.budget:
+            logger.warning("Disk cache: pinned originals alone exceed the budget")
+
     def save_metadata(self):
         """Save metadata about downloaded images to CSV"""
-        metadata_file = self.output_dir / "image_metadata.csv"
-        
-        with open(metadata_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['url', 'product_name', 'category', 'filename', 'local_path', 
-                         'width', 'height', 'file_size_bytes']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for img in self.downloaded_images:
-                writer.writerow({
-                    'url': img.url,
-                    'product_name': img.product_name,
-                    'category': img.category,
-                    'filename': img.filename,
-                    'local_path': img.local_path,
-                    'width': img.size[0],
-                    'height': img.size[1],
-                    'file_size_bytes': img.file_size
-                })
-        
+        metadata_file = self.output_dir / METADATA_FILE
+        write_metadata(self.downloaded_images, metadata_file)
         logger.info(f"Metadata saved to {metadata_file}")
     
     def scrape_all_products(self, limit: Optional[int] = None):
@@ -274,65 +508,186 @@ class ReninImageScraper:
         
         total_images = 0
         
-        for i, product in enumerate(products, 1):
-            logger.info(f"Processing product {i}/{len(products)}: {product['name']}")
-            
-            # Extract images from product page
-            image_urls = self.extract_images_from_product_page(
-                product['url'], 
-                product['category'], 
-                product['name']
-            )
+        try:
+            for i, product in enumerate(products, 1):
+                logger.info(f"Processing product {i}/{len(products)}: {product['name']}")
             
-            # Download each image
-            for image_url in image_urls:
-                product_image = self.download_image(
-                    image_url, 
-                    product['name'], 
-                    product['category']
+                # Extract images from product page
+                image_urls = self.extract_images_from_product_page(
+                    product['url'], 
+                    product['category'], 
+                    product['name']
                 )
+            
+                # Download each image
+                for image_url in image_urls:
+                    product_image = self.download_image(
+                        image_url, 
+                        product['name'], 
+                        product['category']
+                    )
                 
-                if product_image:
-                    self.downloaded_images.append(product_image)
-                    total_images += 1
+                    if product_image:
+                        self.downloaded_images.append(product_image)
+                        total_images += 1
                 
-                # Rate limiting
-                time.sleep(self.rate_limit_delay)
+                    # Rate limiting
+                    time.sleep(self.rate_limit_delay)
             
-            # Longer delay between products
-            time.sleep(3)
+                # Longer delay between products
+                time.sleep(3)
+        finally:
+            self.close_browser()
         
+        if self.quality_gate and self.downloaded_images:
+            self.gate_quality()
+        if self.disk_cache:
+            self.enforce_cache_budget()
+
         # Save metadata
         self.save_metadata()
+        self.image_index.save()
         
-        logger.info(f"Scraping complete! Downloaded {total_images} images from {len(products)} products")
+        logger.info(f"Scraping complete! Downloaded {total_images} images from {len(products)} products"
+                    f" ({self.reused_images} reused from earlier runs)")
+        if self.preflight:
+            stats = self.preflight_stats
+            logger.info(f"Pre-flight skipped {stats['skipped']} images, avoiding "
+                        f"{stats['skipped_bytes'] / 1024:.0f} KB of downloads for "
+                        f"{stats['probe_bytes'] / 1024:.0f} KB of header reads")
+        if self.page_timings:
+            timings = sorted(self.page_timings)
+            logger.info(f"Browser{' (lean)' if self.lean_browser else ''}: {len(timings)} pages, "
+                        f"{sum(timings) / len(timings):.2f}s mean, {timings[len(timings) // 2]:.2f}s median, "
+                        f"{timings[-1]:.2f}s slowest")
         self.print_summary()
     
     def print_summary(self):
         """Print summary of downloaded images by category"""
-        category_counts = {}
-        for img in self.downloaded_images:
-            category_counts[img.category] = category_counts.get(img.category, 0) + 1
-        
-        print("\n" + "="*50)
-        print("DOWNLOAD SUMMARY")
-        print("="*50)
-        for category, count in category_counts.items():
-            print(f"{category.title()}: {count} images")
-        print(f"Total: {len(self.downloaded_images)} images")
-        print(f"Storage location: {self.output_dir.absolute()}")
-        print("="*50)
-
-def main():
+        print_summary(self.downloaded_images, self.output_dir)
+
+
+def check_startup(budget: float = 0.25) -> bool:
+    """Run the quick commands in fresh interpreters: no heavy imports, each under budget seconds"""
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / 'product-sitemap.xml').write_text(
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            '<url><loc>https://www.renin.com/us/mirrors/test-mirror/</loc></url></urlset>')
+        commands = [['--help'], ['sitemap', '--base-url', Path(tmp).as_uri()],
+                    ['metadata', '-o', tmp], ['summary', '-o', tmp]]
+
+        passed = True
+        for command in commands:
+            run = [sys.executable, '-X', 'importtime', __file__, *command]
+            traced = subprocess.run(run, capture_output=True, text=True)
+            imported = {line.rsplit('|', 1)[-1].strip().split('.')[0]
+                        for line in traced.stderr.splitlines() if line.startswith('import time:')}
+            heavy = sorted(imported.intersection(HEAVY_MODULES))
+
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                subprocess.run(run[:1] + run[3:], capture_output=True)
+                timings.append(time.perf_counter() - start)
+            elapsed = min(timings)
+
+            ok = traced.returncode == 0 and not heavy and elapsed <= budget
+            passed = passed and ok
+            print(f"{'PASS' if ok else 'FAIL'}  {' '.join(command[:1]):10s} {elapsed * 1000:6.0f} ms"
+                  + (f"  imports {', '.join(heavy)}" if heavy else "")
+                  + (f"  exit {traced.returncode}" if traced.returncode else ""))
+    return passed
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the scraper"""
-    scraper = ReninImageScraper()
-    
-    # For testing, limit to first 5 products
-    # Remove or increase this limit for full scraping
-    scraper.scrape_all_products(limit=5)
-    
-    # For full scraping, use:
-    # scraper.scrape_all_products()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scrape Renin product images (default command: download)')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--output', '-o', default='renin_images', help='Output directory (default: renin_images)')
+    site = argparse.ArgumentParser(add_help=False)
+    site.add_argument('--base-url', default='https://www.renin.com', help='Site to scrape')
+    browser = argparse.ArgumentParser(add_help=False)
+    browser.add_argument('--lean-browser', action='store_true',
+                         help='Eager page loads, block third-party/font/video/image requests, '
+                              'reuse one browser and wait only for the gallery')
+
+    sitemap = commands.add_parser('sitemap', parents=[site], help='List products from the sitemap')
+    sitemap.add_argument('--category', help='Only this category, e.g. barn-doors')
+
+    extract = commands.add_parser('extract', parents=[site, browser], help='List gallery image URLs of product pages (Selenium)')
+    extract.add_argument('urls', nargs='+', metavar='URL')
+
+    download = commands.add_parser('download', parents=[common, site, browser], help='Scrape and download product images')
+    download.add_argument('--limit', type=int, default=5,
+                          help='Products to scrape, 0 for all (default: 5, for testing)')
+    download.add_argument('--preflight', action='store_true',
+                        help='Read each image\'s size and format from its first bytes before downloading')
+    download.add_argument('--min-width', type=int, default=300, help='Pre-flight: minimum width (default: 300)')
+    download.add_argument('--min-height', type=int, default=300, help='Pre-flight: minimum height (default: 300)')
+    download.add_argument('--formats', default='',
+                          help='Pre-flight: comma-separated formats to keep, e.g. jpeg,png,webp (default: any)')
+    download.add_argument('--no-image-index', action='store_true',
+                          help=f'Do not reuse or record images in the shared index ({INDEX_PATH.name})')
+    download.add_argument('--quality-gate', choices=['tag', 'quarantine'],
+                          help='Score downloads for blank, blurred and near-solid images and list (tag) '
+                               'or move (quarantine) failures')
+    download.add_argument('--cache-budget', type=parse_size, metavar='SIZE',
+                          help='Keep the output directory under SIZE (e.g. 2G) by evicting the least '
+                               'recently used size variants; originals are never evicted')
+
+    commands.add_parser('metadata', parents=[common], help=f'Rebuild {METADATA_FILE} from the images on disk')
+    commands.add_parser('summary', parents=[common], help=f'Summarize {METADATA_FILE}')
+    check = commands.add_parser('check-startup', help='Fail if quick commands import heavy modules or start slowly')
+    check.add_argument('--budget', type=float, default=0.25, help='Seconds per command (default: 0.25)')
+
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv if argv and argv[0] in commands.choices or '-h' in argv or '--help' in argv
+                             else ['download', *argv])
+
+    if args.command == 'sitemap':
+        products = fetch_sitemap(args.base_url)
+        for product in products:
+            if not args.category or product['category'] == args.category:
+                print(f"{product['category']}\t{product['name']}\t{product['url']}")
+
+    elif args.command == 'extract':
+        scraper = ReninImageScraper(base_url=args.base_url, lean_browser=args.lean_browser)
+        try:
+            for url in args.urls:
+                for image_url in scraper.extract_images_from_product_page(url, 'other', url):
+                    print(image_url)
+        finally:
+            scraper.close_browser()
+
+    elif args.command == 'download':
+        scraper = ReninImageScraper(base_url=args.base_url, output_dir=args.output, preflight=args.preflight,
+                                    image_index=ImageIndex(None if args.no_image_index else INDEX_PATH),
+                                    min_width=args.min_width, min_height=args.min_height,
+                                    quality_gate=args.quality_gate, lean_browser=args.lean_browser,
+                                    cache_budget=args.cache_budget,
+                                    allowed_formats=[f.strip().lower() for f in args.formats.split(',') if f.strip()])
+        scraper.scrape_all_products(limit=args.limit or None)
+
+    elif args.command == 'metadata':
+        output_dir = Path(args.output)
+        metadata_file = output_dir / METADATA_FILE
+        known = {img.filename: img for img in load_metadata(metadata_file)}
+        images = scan_images(output_dir, known)
+        if output_dir.is_dir():
+            write_metadata(images, metadata_file)
+        logger.info(f"Metadata rebuilt: {len(images)} images ({len(known)} listed before) in {metadata_file}")
+
+    elif args.command == 'summary':
+        print_summary(load_metadata(Path(args.output) / METADATA_FILE), Path(args.output))
+
+    elif args.command == 'check-startup':
+        sys.exit(0 if check_startup(args.budget) else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
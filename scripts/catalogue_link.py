@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Link downloaded product images into the catalogue
+
+Joins what the scrapers saved (renin_images/image_metadata.csv from the root
+scraper, renin_images/metadata/products.json from scripts/renin-image-scraper.py,
+and the shared image index) with the catalogue (data/renin-products-database.json,
+data/simple-products.json and the Image Src rows of data/PRODUCT_IMPORT.csv).
+
+The scraped side is loaded once into dicts keyed by slug, SKU and
+canonical_image_url(), so each catalogue product is matched with a few
+lookups instead of a scan: linking is linear in the size of both sides.
+Only images the site serves are linked: files under public/, or scraper
+output that media_sync.py has published there (renin_images/ is synced to
+public/images/renin/ by default, see --published). Run the sync first;
+images it has not copied yet are left out rather than linked to a 404.
+
+Catalogue JSON gets the linked web paths appended to its "images" arrays
+(files whose products have no such arrays, like data/simple-products.json,
+are left alone); the import CSV is streamed one product (handle) at a time,
+existing rows copied through byte for byte and an image row added per newly
+linked image.
+
+Usage:
+    python scripts/media_sync.py renin_images public/images/renin
+    python scripts/catalogue_link.py --dry-run
+    python scripts/catalogue_link.py
+    python scripts/catalogue_link.py --scraped out/image_metadata.csv --published out=public/images/out
+"""
+
+import csv
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from image_index import INDEX_PATH, ImageIndex, canonical_image_url, is_image_url
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = REPO_ROOT / 'public'
+DATA_DIR = REPO_ROOT / 'data'
+SCRAPED_SOURCES = [REPO_ROOT / 'renin_images' / 'image_metadata.csv',
+                   REPO_ROOT / 'renin_images' / 'metadata' / 'products.json']
+CATALOGUE_FILES = [DATA_DIR / 'renin-products-database.json', DATA_DIR / 'simple-products.json']
+IMPORT_CSV = DATA_DIR / 'PRODUCT_IMPORT.csv'
+SITE_URL = 'https://pgclosets.com'
+# Scraper output directory -> where media_sync.py publishes it under public/
+PUBLISHED = {REPO_ROOT / 'renin_images': PUBLIC_DIR / 'images' / 'renin'}
+
+
+def slug_key(text: Optional[str]) -> Optional[str]:
+    """'Gatsby Chevron Barn Door' and 'gatsby-chevron-barn-door' -> the same key"""
+    key = re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-')
+    return key or None
+
+
+def sku_key(sku: Optional[str]) -> Optional[str]:
+    return (sku or '').strip().upper() or None
+
+
+def web_path(path: Path) -> Optional[str]:
+    """Site path of a file under public/ (the web root); None for anything the site does not serve"""
+    try:
+        return '/' + path.resolve().relative_to(PUBLIC_DIR.resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def image_url(image) -> Optional[str]:
+    """Catalogue images are URL strings or {"url"/"src": ...} objects"""
+    if isinstance(image, dict):
+        return image.get('url') or image.get('src')
+    return image if isinstance(image, str) else None
+
+
+def _records(f) -> Iterator[Tuple[List[str], str]]:
+    """(fields, raw text) per CSV record, so rows that stay can be copied verbatim"""
+    raw = []
+
+    def lines():
+        for line in f:
+            raw.append(line)
+            yield line
+
+    for fields in csv.reader(lines()):
+        yield fields, ''.join(raw)
+        raw.clear()
+
+
+class CatalogueLinker:
+    """Scraped products indexed by slug, SKU and canonical image URL"""
+
+    def __init__(self, image_index: Optional[ImageIndex] = None, published: Optional[Dict[Path, Path]] = None):
+        self.image_index = image_index
+        self.published = {Path(source).resolve(): Path(dest).resolve()
+                          for source, dest in (PUBLISHED if published is None else published).items()}
+        self.groups: List[List[str]] = []  # Local images (web paths) of each scraped product
+        self.by_slug: Dict[str, List[int]] = defaultdict(list)
+        self.by_sku: Dict[str, List[int]] = defaultdict(list)
+        self.by_image: Dict[str, List[int]] = defaultdict(list)
+
+    def _add(self, group: int, slugs: Iterable = (), skus: Iterable = (), urls: Iterable = ()):
+        for index, keys in ((self.by_slug, map(slug_key, slugs)), (self.by_sku, map(sku_key, skus)),
+                            (self.by_image, (canonical_image_url(url) for url in urls if url))):
+            for key in keys:
+                if key and group not in index[key]:
+                    index[key].append(group)
+
+    def _new_group(self) -> int:
+        self.groups.append([])
+        return len(self.groups) - 1
+
+    def published_dir(self, directory: Path) -> Optional[Tuple[Path, str]]:
+        """(directory the site serves directory's files from, its web path); None if they are not published"""
+        directory = directory.resolve()
+        for source, dest in self.published.items():
+            try:
+                directory = dest / directory.relative_to(source)
+                break
+            except ValueError:
+                pass
+        path = web_path(directory)
+        return (directory, path) if path else None
+
+    def site_path(self, path: Path) -> Optional[str]:
+        """Web path of a local image if the site serves it (itself or its published copy)"""
+        directory = self.published_dir(Path(path).parent)
+        if directory and (directory[0] / Path(path).name).is_file():
+            return f"{directory[1]}/{Path(path).name}"
+        return None
+
+    def _add_image(self, group: int, directory: Optional[Tuple[Path, str]], filename: str):
+        """directory is published_dir(), worked out once per directory rather than per file"""
+        if directory and (directory[0] / filename).is_file():
+            image = f"{directory[1]}/{filename}"
+            if image not in self.groups[group]:
+                self.groups[group].append(image)
+
+    def add_image_metadata(self, metadata_file: Path):
+        """Root scraper's image_metadata.csv: one row per image, grouped by product name"""
+        groups = {}
+        directories = {}
+        with open(metadata_file, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                name = row['product_name']
+                if name not in groups:
+                    groups[name] = self._new_group()
+                    self._add(groups[name], slugs=[name])
+                if row['category'] not in directories:
+                    directories[row['category']] = self.published_dir(metadata_file.parent / row['category'])
+                self._add_image(groups[name], directories[row['category']], row['filename'])
+                self._add(groups[name], urls=[row['url']])
+
+    def add_scraped_products(self, products_file: Path):
+        """scripts/renin-image-scraper.py's metadata/products.json"""
+        directory = self.published_dir(products_file.parent.parent / 'barn_doors')
+        with open(products_file, encoding='utf-8') as f:
+            products = json.load(f)
+        for product in products:
+            group = self._new_group()
+            catalogue = product.get('catalogue') or {}
+            variants = catalogue.get('variants') or []
+            for image in product.get('images', []):
+                if image.get('filename'):
+                    self._add_image(group, directory, image['filename'])
+            self._add(group,
+                      slugs=[product.get('slug'), product.get('name'), catalogue.get('name')],
+                      skus=[catalogue.get('sku')] + [variant.get('sku') for variant in variants],
+                      urls=[image['url'] for image in product.get('images', [])]
+                      + (catalogue.get('gallery') or []) + [variant.get('image') for variant in variants])
+
+    def add_source(self, path: Path):
+        if path.suffix == '.csv':
+            self.add_image_metadata(path)
+        else:
+            self.add_scraped_products(path)
+
+    def images_for(self, slugs: Iterable = (), skus: Iterable = (), urls: Iterable = ()) -> List[str]:
+        """Local images of every scraped product sharing a SKU, slug or image with a catalogue product"""
+        groups = []
+        for index, keys in ((self.by_sku, map(sku_key, skus)), (self.by_slug, map(slug_key, slugs))):
+            for key in keys:
+                groups.extend(index.get(key, ()) if key else ())
+        images = []
+        for url in map(image_url, urls):
+            if not (url and url.startswith(('http://', 'https://')) and is_image_url(url)):
+                continue
+            matches = self.by_image.get(canonical_image_url(url))
+            if matches:
+                groups.extend(matches)
+            elif self.image_index is not None:
+                local = self.image_index.lookup(url)  # Saved, but not by a scraper run listed here
+                served = self.site_path(local) if local else None
+                if served:
+                    images.append(served)
+
+        linked = []
+        for group in dict.fromkeys(groups):
+            linked.extend(self.groups[group])
+        return list(dict.fromkeys(linked + images))
+
+    def link_products_json(self, path: Path, dry_run: bool = False) -> Optional[Tuple[int, int, int]]:
+        """Append linked images to each product's "images"; (products, products linked, images added)
+
+        None, and nothing written, if the file's products have no "images" arrays: its schema has no
+        place for them.
+        """
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        document = json.loads(text)
+        products = document['products'] if isinstance(document, dict) else document
+        if not any(isinstance(product.get('images'), list) for product in products):
+            return None
+
+        linked = added = 0
+        for product in products:
+            if not isinstance(product.get('images'), list):
+                continue
+            renin = product.get('renin') or {}
+            images = product['images']
+            existing = set(map(image_url, images))
+            new_images = [image for image in self.images_for(
+                slugs=[product.get('slug'), product.get('name') or product.get('title')],
+                skus=[product.get('sku'), renin.get('sku')] + [v.get('sku') for v in renin.get('variants') or []],
+                urls=[product.get('image')] + images + (renin.get('gallery') or []),
+            ) if image not in existing]
+            if new_images:
+                product['images'] = images + new_images
+                linked += 1
+                added += len(new_images)
+
+        if added and not dry_run:
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+                if text.endswith('\n'):
+                    f.write('\n')
+            tmp_path.replace(path)
+        return len(products), linked, added
+
+    def link_import_csv(self, path: Path, site_url: str = SITE_URL, dry_run: bool = False) -> Tuple[int, int, int]:
+        """Add an image row per newly linked image after each handle's rows; (handles, linked, added)"""
+        site_url = site_url.rstrip('/')
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        handles = linked = added = 0
+
+        with open(path, newline='', encoding='utf-8') as src, \
+                open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            records = _records(src)
+            header, raw = next(records)
+            dst.write(raw)
+            column = {name: header.index(name) for name in
+                      ('Handle', 'Title', 'Variant SKU', 'Image Src', 'Image Position', 'Image Alt Text')}
+            writer = csv.writer(dst, lineterminator='\n')
+            ends_with_newline = raw.endswith('\n')
+
+            def field(fields, name):
+                return fields[column[name]] if column[name] < len(fields) else ''
+
+            def flush(group):
+                nonlocal handles, linked, added, ends_with_newline
+                if not group:
+                    return
+                handles += 1
+                rows = [fields for fields, _ in group]
+                for _, raw in group:
+                    dst.write(raw)
+                ends_with_newline = group[-1][1].endswith('\n')
+
+                sources = [field(row, 'Image Src') for row in rows]
+                existing = set(sources)
+                new_images = [site_url + image for image in self.images_for(
+                    slugs=[field(rows[0], 'Handle'), field(rows[0], 'Title')],
+                    skus=[field(row, 'Variant SKU') for row in rows],
+                    urls=sources,
+                ) if site_url + image not in existing]
+                if not new_images:
+                    return
+                if not ends_with_newline:
+                    dst.write('\n')
+                position = max((int(field(row, 'Image Position')) for row in rows
+                                if field(row, 'Image Position').isdigit()), default=0)
+                for image in new_images:
+                    position += 1
+                    row = [''] * len(header)
+                    row[column['Handle']] = field(rows[0], 'Handle')
+                    row[column['Image Src']] = image
+                    row[column['Image Position']] = str(position)
+                    row[column['Image Alt Text']] = field(rows[0], 'Title')
+                    writer.writerow(row)
+                ends_with_newline = True
+                linked += 1
+                added += len(new_images)
+
+            group = []
+            for fields, raw in records:
+                if group and fields and fields[column['Handle']] != group[0][0][column['Handle']]:
+                    flush(group)
+                    group = []
+                group.append((fields, raw))
+            flush(group)
+
+        if added and not dry_run:
+            tmp_path.replace(path)
+        else:
+            tmp_path.unlink()
+        return handles, linked, added
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Link scraped product images into the catalogue')
+    parser.add_argument('--scraped', action='append', type=Path,
+                        help='image_metadata.csv or metadata/products.json from a scraper run, repeatable '
+                             '(default: both under renin_images/)')
+    parser.add_argument('--catalogue', action='append', type=Path,
+                        help='Products JSON to update, repeatable '
+                             '(default: data/renin-products-database.json, data/simple-products.json)')
+    parser.add_argument('--import-csv', type=Path, default=IMPORT_CSV,
+                        help='Shopify import CSV to add image rows to (default: data/PRODUCT_IMPORT.csv)')
+    parser.add_argument('--site-url', default=SITE_URL, help=f'Prefix for Image Src URLs (default: {SITE_URL})')
+    parser.add_argument('--published', action='append', metavar='SOURCE=DEST',
+                        help='Scraper output SOURCE is published to DEST under public/ by media_sync.py, '
+                             'repeatable (default: renin_images=public/images/renin)')
+    parser.add_argument('--no-image-index', action='store_true',
+                        help=f'Do not fall back to the shared image index ({INDEX_PATH.name})')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='Report links without writing anything')
+    args = parser.parse_args()
+
+    published = None
+    if args.published:
+        published = {}
+        for mapping in args.published:
+            source, sep, dest = mapping.partition('=')
+            if not sep or web_path(Path(dest)) is None:
+                parser.error(f"--published needs SOURCE=DEST with DEST under {PUBLIC_DIR}: {mapping}")
+            published[Path(source)] = Path(dest)
+
+    linker = CatalogueLinker(None if args.no_image_index else ImageIndex(INDEX_PATH), published)
+    for source in args.scraped or SCRAPED_SOURCES:
+        if source.exists():
+            linker.add_source(source)
+            print(f"📥 Loaded {source}")
+        elif args.scraped:
+            print(f"❌ Not found: {source}")
+            sys.exit(1)
+    print(f"🗂️  {len(linker.groups)} scraped products: {len(linker.by_slug)} slugs, "
+          f"{len(linker.by_sku)} SKUs, {len(linker.by_image)} image URLs")
+
+    for path in args.catalogue or CATALOGUE_FILES:
+        result = linker.link_products_json(path, args.dry_run)
+        if result is None:
+            print(f"⏭️  {path.name}: products have no \"images\" arrays, skipped")
+            continue
+        products, linked, added = result
+        print(f"🔗 {path.name}: {linked} of {products} products linked, {added} images added")
+    if args.import_csv and args.import_csv.exists():
+        handles, linked, added = linker.link_import_csv(args.import_csv, args.site_url, args.dry_run)
+        print(f"🔗 {args.import_csv.name}: {linked} of {handles} handles linked, {added} image rows added")
+    if args.dry_run:
+        print("📝 Dry run: nothing written")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,57 +4,81 @@ Comprehensive TypeScript/ESLint error fixer
 Fixes all common patterns automatically
 """
 
+import io
 import os
 import re
 import subprocess
+import contextlib
+import difflib
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from fix_cache import FixCache
+from fix_rules import Rule, RuleSet
+from fix_watch import describe_backend, watch_ts_changes
+from ts_walk import walk_ts_files
 
 # Base directory
 BASE_DIR = Path("/Users/spencercarroll/pgclosets-store-main")
 
-def find_ts_files() -> List[Path]:
-    """Find all TypeScript files"""
-    patterns = ["**/*.ts", "**/*.tsx"]
-    files = []
-    for pattern in patterns:
-        files.extend(BASE_DIR.glob(pattern))
-    # Exclude node_modules, .next, etc
-    return [f for f in files if "node_modules" not in str(f) and ".next" not in str(f)]
+# Golden corpus: <name>.before and the hand-checked <name>.after every rule change must keep producing
+GOLDEN_DIR = Path(__file__).resolve().parent / "fixtures" / "comprehensive-fix"
 
-def fix_import_types(content: str) -> str:
-    """Fix type-only imports"""
-    fixes = [
-        # NextRequest/NextResponse
-        (r'import { NextRequest, NextResponse }', 'import type { NextRequest }\nimport { NextResponse }'),
-        (r'import { NextRequest }', 'import type { NextRequest }'),
-        # Metadata
-        (r'import { Metadata }', 'import type { Metadata }'),
-    ]
+def find_ts_files() -> Iterator[Path]:
+    """Find all TypeScript files, lazily, skipping node_modules, .next and .gitignore'd paths"""
+    return walk_ts_files(BASE_DIR)
 
-    for pattern, replacement in fixes:
-        content = re.sub(pattern, replacement, content)
+IMPORT_TYPE_RULES = [
+    # NextRequest/NextResponse
+    Rule("import_types", r'import { NextRequest, NextResponse }', 'import type { NextRequest }\nimport { NextResponse }'),
+    Rule("import_types", r'import { NextRequest }', 'import type { NextRequest }'),
+    # Metadata
+    Rule("import_types", r'import { Metadata }', 'import type { Metadata }'),
+]
 
-    return content
-
-def fix_optional_chaining(content: str) -> str:
-    """Fix optional chaining issues"""
+OPTIONAL_CHAINING_RULES = [
     # Fix split()[0].trim() → split()[0]?.trim()
-    content = re.sub(
-        r'\.split\("([^"]+)"\)\[0\]\.trim\(\)',
-        r'.split("\1")[0]?.trim()',
-        content
-    )
-
+    Rule("optional_chaining", r'\.split\("([^"]+)"\)\[0\]\.trim\(\)', r'.split("\1")[0]?.trim()'),
     # Add || "unknown" to headers.get()
-    content = re.sub(
-        r'request\.headers\.get\("user-agent"\)(?!\s*\|\|)',
-        r'request.headers.get("user-agent") || "unknown"',
-        content
-    )
+    Rule("optional_chaining", r'request\.headers\.get\("user-agent"\)(?!\s*\|\|)',
+         r'request.headers.get("user-agent") || "unknown"'),
+]
 
+CONSOLE_RULES = [
+    # Comment out console.log but keep console.error/warn
+    Rule("console_statements", r'^(\s*)console\.log\(', r'\1// console.log(', re.MULTILINE),
+]
+
+PROP_TYPE_RULES = [
+    # Button/Text variants
+    Rule("prop_types", r'variant="body"', 'variant="secondary"'),
+    Rule("prop_types", r'variant="large"', 'variant="primary"'),
+    Rule("prop_types", r'variant="small"', 'variant="secondary"'),
+    # HTML attributes
+    Rule("prop_types", r'loading="lazy"(?! as any)', 'loading="lazy" as any'),
+    Rule("prop_types", r'fetchpriority=', 'fetchPriority='),
+]
+
+# Every rule apply_all_fixes runs, compiled once and gated by required literals
+RULES = RuleSet(IMPORT_TYPE_RULES + OPTIONAL_CHAINING_RULES + CONSOLE_RULES + PROP_TYPE_RULES)
+
+def apply_rules(rules: List[Rule], content: str) -> str:
+    """Apply rules one re.sub at a time, in order"""
+    for rule in rules:
+        content = re.sub(rule.pattern, rule.replacement, content, flags=rule.flags)
     return content
 
+def fix_import_types(content: str) -> str:
+    """Fix type-only imports"""
+    return apply_rules(IMPORT_TYPE_RULES, content)
+
+def fix_optional_chaining(content: str) -> str:
+    """Fix optional chaining issues"""
+    return apply_rules(OPTIONAL_CHAINING_RULES, content)
+
 def fix_null_checks(content: str) -> str:
     """Add null checks for possibly undefined objects"""
     # This is complex and context-dependent
@@ -83,14 +107,7 @@ def fix_async_await(content: str) -> str:
 
 def fix_console_statements(content: str) -> str:
     """Remove or comment console.log statements"""
-    # Comment out console.log but keep console.error/warn
-    content = re.sub(
-        r'^(\s*)console\.log\(',
-        r'\1// console.log(',
-        content,
-        flags=re.MULTILINE
-    )
-    return content
+    return apply_rules(CONSOLE_RULES, content)
 
 def fix_dangerous_html(content: str) -> str:
     """Fix dangerouslySetInnerHTML warnings"""
@@ -99,20 +116,7 @@ def fix_dangerous_html(content: str) -> str:
 
 def fix_prop_types(content: str) -> str:
     """Fix invalid prop types"""
-    fixes = [
-        # Button/Text variants
-        (r'variant="body"', 'variant="secondary"'),
-        (r'variant="large"', 'variant="primary"'),
-        (r'variant="small"', 'variant="secondary"'),
-        # HTML attributes
-        (r'loading="lazy"', 'loading="lazy" as any'),
-        (r'fetchpriority=', 'fetchPriority='),
-    ]
-
-    for pattern, replacement in fixes:
-        content = re.sub(pattern, replacement, content)
-
-    return content
+    return apply_rules(PROP_TYPE_RULES, content)
 
 def fix_react_quotes(content: str) -> str:
     """Fix unescaped quotes in JSX"""
@@ -125,29 +129,8 @@ def apply_all_fixes(filepath: Path) -> Tuple[bool, List[str]]:
         with open(filepath, 'r', encoding='utf-8') as f:
             original = f.read()
 
-        content = original
-        fixes_applied = []
-
-        # Apply all fix functions
-        new_content = fix_import_types(content)
-        if new_content != content:
-            fixes_applied.append("import_types")
-            content = new_content
-
-        new_content = fix_optional_chaining(content)
-        if new_content != content:
-            fixes_applied.append("optional_chaining")
-            content = new_content
-
-        new_content = fix_console_statements(content)
-        if new_content != content:
-            fixes_applied.append("console_statements")
-            content = new_content
-
-        new_content = fix_prop_types(content)
-        if new_content != content:
-            fixes_applied.append("prop_types")
-            content = new_content
+        # Same result as the fix_* functions in sequence, skipping rules that can't match
+        content, fixes_applied = RULES.apply(original)
 
         # Write back if changed
         if content != original:
@@ -161,28 +144,188 @@ def apply_all_fixes(filepath: Path) -> Tuple[bool, List[str]]:
         print(f"Error processing {filepath}: {e}")
         return False, []
 
+def apply_fix_chain(content: str) -> Tuple[str, List[str]]:
+    """Reference path: each fix_* function in turn, as apply_all_fixes used to run them"""
+    fixes_applied = []
+    for fix_type, fix in [("import_types", fix_import_types), ("optional_chaining", fix_optional_chaining),
+                          ("console_statements", fix_console_statements), ("prop_types", fix_prop_types)]:
+        new_content = fix(content)
+        if new_content != content:
+            fixes_applied.append(fix_type)
+            content = new_content
+    return content, fixes_applied
+
+def check_golden(golden_dir: Path = GOLDEN_DIR) -> int:
+    """Run the rule engine and the fix_* chain over the golden corpus; return mismatches"""
+    mismatches = 0
+    cases = sorted(golden_dir.glob("*.before"))
+    for before_path in cases:
+        after_path = before_path.with_suffix(".after")
+        before = before_path.read_text(encoding='utf-8')
+        expected = after_path.read_text(encoding='utf-8')
+        for name, (content, _) in [("engine", RULES.apply(before)), ("fix chain", apply_fix_chain(before))]:
+            if content != expected:
+                mismatches += 1
+                print(f"❌ Golden mismatch ({name}): {before_path.stem}")
+                print(''.join(difflib.unified_diff(expected.splitlines(True), content.splitlines(True),
+                                                   after_path.name, f"{name} output")))
+    print(f"\n🥇 Checked {len(cases)} golden cases: {mismatches} mismatches")
+    return mismatches
+
+def check_engine(files: Iterable[Path]) -> int:
+    """Dry run comparing the rule engine to the fix_* chain; return mismatches"""
+    mismatches = 0
+    checked = 0
+    for filepath in files:
+        checked += 1
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"Error processing {filepath}: {e}")
+            continue
+        if RULES.apply(content) != apply_fix_chain(content):
+            mismatches += 1
+            print(f"❌ Engine mismatch: {filepath.relative_to(BASE_DIR)}")
+    print(f"\n🔬 Checked {checked} files: {mismatches} mismatches")
+    return mismatches
+
+class FileResult(NamedTuple):
+    filepath: Path
+    changed: bool
+    fixes: List[str]
+    output: str
+    hits: Dict[int, int]
+
+    @property
+    def clean(self) -> bool:
+        # apply_all_fixes only prints on errors
+        return not self.changed and not self.output
+
+def fix_file_job(filepath: Path) -> FileResult:
+    """apply_all_fixes, capturing its output so it can be replayed in file order"""
+    RULES.hits.clear()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        changed, fixes = apply_all_fixes(filepath)
+    return FileResult(filepath, changed, fixes, output.getvalue(), dict(RULES.hits))
+
+def run_fixes(files: Iterable[Path], jobs: int) -> Iterator[FileResult]:
+    """Fix files one by one, or across a process pool; results come back in file order"""
+    if jobs == 1:
+        yield from map(fix_file_job, files)
+        return
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        yield from pool.map(fix_file_job, files, chunksize=32)
+
+def watch(cache: Optional[FixCache], debounce: float, polling: bool):
+    """Fix .ts/.tsx files as they change, with RULES and the cache kept warm"""
+    print(f"\n👀 Watching {BASE_DIR} via {describe_backend(polling)} (Ctrl-C to stop)")
+    try:
+        for batch in watch_ts_changes(BASE_DIR, debounce=debounce, polling=polling):
+            for filepath in sorted(batch):
+                started = time.perf_counter()
+                # Our own writes come back as events: the rerun finds nothing and marks them clean
+                if cache and cache.is_clean(filepath):
+                    continue
+                result = fix_file_job(filepath)
+                print(result.output, end='')
+                if cache and result.clean:
+                    cache.mark_clean(filepath)
+                if result.changed:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    print(f"✅ Fixed: {filepath.relative_to(BASE_DIR)} ({', '.join(result.fixes)}) "
+                          f"in {elapsed:.1f} ms")
+            if cache:
+                cache.save()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
 def main():
+    global BASE_DIR
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fix common TypeScript/ESLint error patterns')
+    parser.add_argument('--base-dir', type=Path, default=BASE_DIR,
+                        help=f'Project root to fix (default: {BASE_DIR})')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes; 0 = one per CPU core (default: 1)')
+    parser.add_argument('--rule-stats', action='store_true',
+                        help='Print per-rule hit counts')
+    parser.add_argument('--check-engine', action='store_true',
+                        help='Check the rules against the golden corpus, then compare the rule engine '
+                             'with the fix_* functions on the tree without writing')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Process every file, ignoring and not updating the clean-file cache')
+    parser.add_argument('--no-type-check', action='store_true',
+                        help="Don't run npm run type-check afterwards")
+    parser.add_argument('--watch', action='store_true',
+                        help='After the full pass, keep fixing files as they change (no type check)')
+    parser.add_argument('--debounce', type=float, default=0.1,
+                        help='Watch mode: seconds of quiet before fixing a batch (default: 0.1)')
+    parser.add_argument('--poll', action='store_true',
+                        help='Watch mode: poll for changes even if watchdog is installed')
+    args = parser.parse_args()
+    BASE_DIR = args.base_dir
+
+    if args.check_engine:
+        mismatches = check_golden()
+        if BASE_DIR.is_dir():
+            mismatches += check_engine(find_ts_files())
+        raise SystemExit(1 if mismatches else 0)
+
     print("🚀 Starting comprehensive error fixes...")
 
-    files = find_ts_files()
-    print(f"📁 Found {len(files)} TypeScript files")
+    cache = None if args.no_cache else FixCache(BASE_DIR, "comprehensive-fix", RULES.fingerprint())
+    found = {'files': 0, 'processed': 0}
+
+    def scan() -> Iterator[Path]:
+        """Walk lazily, so fixing starts on the first file found"""
+        for filepath in find_ts_files():
+            found['files'] += 1
+            # Skip files unchanged since a run found nothing to fix under these exact rules
+            if cache and cache.is_clean(filepath):
+                continue
+            found['processed'] += 1
+            yield filepath
 
     fixed_count = 0
     total_fixes = []
-
-    for filepath in files:
-        changed, fixes = apply_all_fixes(filepath)
+    rule_hits = Counter()
+
+    for result in run_fixes(scan(), args.jobs):
+        filepath, changed, fixes, output, hits = result
+        print(output, end='')
+        rule_hits.update(hits)
+        if cache and result.clean:
+            cache.mark_clean(filepath)
         if changed:
             fixed_count += 1
             total_fixes.extend(fixes)
             print(f"✅ Fixed: {filepath.relative_to(BASE_DIR)} ({', '.join(fixes)})")
 
-    print(f"\n✨ Fixed {fixed_count} files")
-    print(f"📊 Total fixes applied:")
-    for fix_type in set(total_fixes):
+    print(f"\n📁 Found {found['files']} TypeScript files, processed {found['processed']} new or changed")
+    print(f"✨ Fixed {fixed_count} files")
+    print("📊 Total fixes applied:")
+    for fix_type in dict.fromkeys(total_fixes):
         count = total_fixes.count(fix_type)
         print(f"  - {fix_type}: {count}")
 
+    if args.rule_stats:
+        print("\n📏 Rule hits:")
+        for index in range(len(RULES.rules)):
+            print(f"  {rule_hits[index]:6d}  {RULES.describe(index)}")
+
+    if cache:
+        cache.save()
+
+    if args.watch:
+        watch(cache, args.debounce, args.poll)
+        return
+
+    if args.no_type_check:
+        return
+
     # Run type check
     print("\n🔍 Running type check...")
     result = subprocess.run(
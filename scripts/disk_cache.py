@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Disk-budgeted LRU cache directories for scraper output
+
+The scrapers keep every file they ever fetched or generated. DiskCache
+tracks the files under one directory in a small index
+(<root>/.disk-cache-index.json: relative path -> [bytes, last use, pinned])
+and enforce() deletes the least recently used unpinned files until the
+directory is back under LOW_WATER of its budget, so a run that ends just over
+it does not evict again on the next. Originals are pinned; size variants,
+precompressed siblings and other cached HTTP bodies can be fetched or
+generated again.
+
+record() and touch() only update the index. Eviction happens in enforce(),
+which the scrapers call once their download threads are done, so a file is
+never deleted while another thread is copying or serving it; the directory
+can run over its budget until then.
+
+Last use lives in the index rather than in file atimes, which build machines
+usually mount with noatime/relatime. Only files recorded through the API (or
+adopted with --scan) are managed; anything else in the directory is left alone.
+
+Usage:
+    python scripts/disk_cache.py renin_images --stats
+    python scripts/disk_cache.py public/renin --budget 2G --dry-run
+    python scripts/disk_cache.py renin_images --scan --suffix .jpg --suffix .png --pin '*_main_*' --budget 500M
+"""
+
+import fnmatch
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+INDEX_NAME = ".disk-cache-index.json"
+LOW_WATER = 0.9  # Evict down to this share of the budget
+SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', re.I)
+
+
+def parse_size(text: str) -> int:
+    """'500M', '2G', '1.5GB', '750k' or plain bytes -> bytes"""
+    match = SIZE_RE.match(text)
+    if not match:
+        raise ValueError(f"not a size: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** ' KMGT'.index(unit.upper() or ' '))
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class DiskCache:
+    """LRU bookkeeping for the files under root, evicting unpinned ones past budget
+
+    Thread-safe. save() merges with entries other processes saved meanwhile.
+    budget is enforce()'s default; None tracks use until enforce() is given one.
+    """
+
+    def __init__(self, root: Path, budget: Optional[int] = None):
+        self.root = Path(root).resolve()
+        self.budget = budget
+        self.path = self.root / INDEX_NAME
+        self.entries = self._read()  # Relative path -> [bytes, last use, pinned]
+        self.updates = {}
+        self.removed = set()
+        self.total = sum(entry[0] for entry in self.entries.values())
+        self.lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Missing or corrupt: start over
+
+    def _key(self, path) -> Optional[str]:
+        """Index key for path, None for files outside root (e.g. reused from another scraper's tree)"""
+        try:
+            return Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def _set(self, key: str, entry: list):
+        """Caller holds the lock"""
+        self.total += entry[0] - self.entries.get(key, (0,))[0]
+        self.entries[key] = self.updates[key] = entry
+        self.removed.discard(key)
+
+    def record(self, path, pinned: bool = False):
+        """Note that path was just written or used; pinned files are never evicted
+
+        Never evicts: another thread may be about to read a file it found.
+        """
+        key = self._key(path)
+        if key is None:
+            return
+        size = os.stat(path).st_size
+        with self.lock:
+            previous = self.entries.get(key)
+            self._set(key, [size, time.time(), pinned or bool(previous and previous[2])])
+
+    def touch(self, path):
+        """Mark a tracked file as just used (a cache hit)"""
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)  # None for untracked files and key None
+            if entry is not None:
+                self._set(key, [entry[0], time.time(), entry[2]])
+
+    def pin(self, path, pinned: bool = True):
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self._set(key, [entry[0], entry[1], pinned])
+
+    def scan(self, suffixes: Optional[Tuple[str, ...]] = None, pin_patterns: Iterable[str] = ()) -> int:
+        """Adopt untracked files (last use = mtime) and forget tracked ones that are gone; return adopted"""
+        pin_patterns = list(pin_patterns)
+        found = set()
+        adopted = 0
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.') or (suffixes and not filename.lower().endswith(suffixes)):
+                    continue
+                path = Path(directory) / filename
+                key = path.relative_to(self.root).as_posix()
+                found.add(key)
+                pinned = any(fnmatch.fnmatch(key, pattern) for pattern in pin_patterns)
+                with self.lock:
+                    entry = self.entries.get(key)
+                    if entry is None:
+                        stat = path.stat()
+                        self._set(key, [stat.st_size, stat.st_mtime, pinned])
+                        adopted += 1
+                    elif pinned and not entry[2]:
+                        self._set(key, [entry[0], entry[1], True])
+        with self.lock:
+            for key in [key for key in self.entries if key not in found and not (self.root / key).exists()]:
+                self._forget(key)
+        return adopted
+
+    def _forget(self, key: str):
+        """Caller holds the lock"""
+        self.total -= self.entries.pop(key)[0]
+        self.updates.pop(key, None)
+        self.removed.add(key)
+
+    def _evict(self, target: int, dry_run: bool = False) -> List[Tuple[str, int]]:
+        """Delete least recently used unpinned files until total <= target; caller holds the lock"""
+        evicted = []
+        total = self.total
+        for key, (size, _, _) in sorted(((key, entry) for key, entry in self.entries.items()
+                                         if not entry[2]), key=lambda item: item[1][1]):
+            if total <= target:
+                break
+            evicted.append((key, size))
+            total -= size
+            if not dry_run:
+                (self.root / key).unlink(missing_ok=True)
+                self._forget(key)
+        return evicted
+
+    def usage(self) -> Tuple[int, int, int]:
+        """(tracked files, bytes, pinned bytes)"""
+        with self.lock:
+            return (len(self.entries), self.total,
+                    sum(entry[0] for entry in self.entries.values() if entry[2]))
+
+    def enforce(self, budget: Optional[int] = None, dry_run: bool = False) -> List[Tuple[str, int]]:
+        """Evict least recently used unpinned files until the directory fits budget; return (path, bytes)
+
+        Call it once no other thread is using the files (e.g. after a download pool has finished).
+        """
+        budget = self.budget if budget is None else budget
+        if budget is None:
+            return []
+        with self.lock:
+            for key in [key for key in self.entries if not (self.root / key).exists()]:
+                self._forget(key)  # Deleted or moved by something else
+            if self.total <= budget:
+                return []
+            return self._evict(int(budget * LOW_WATER), dry_run=dry_run)
+
+    def save(self):
+        if not self.updates and not self.removed:
+            return
+        with self.lock:
+            entries = self._read()
+            for key in self.removed:
+                entries.pop(key, None)
+            for key, entry in self.updates.items():
+                other = entries.get(key)
+                if other is None or other[1] <= entry[1]:
+                    entries[key] = entry
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=0, sort_keys=True)
+            tmp_path.replace(self.path)
+            self.entries = entries
+            self.total = sum(entry[0] for entry in entries.values())
+            self.updates = {}
+            self.removed = set()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Keep a scraper output directory within a disk budget')
+    parser.add_argument('root', type=Path, help='Directory to manage (e.g. renin_images, public/renin)')
+    parser.add_argument('--budget', '-b', type=parse_size, help='Disk budget, e.g. 500M or 2G')
+    parser.add_argument('--scan', action='store_true',
+                        help='Adopt untracked files (last use = mtime) and forget deleted ones first')
+    parser.add_argument('--suffix', action='append', default=[],
+                        help='With --scan, only adopt files with this suffix (repeatable)')
+    parser.add_argument('--pin', action='append', default=[], metavar='PATTERN',
+                        help='With --scan, pin files whose relative path matches this glob (repeatable)')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='List what would be evicted')
+    parser.add_argument('--stats', action='store_true', help='Only report usage')
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        print(f"❌ Not a directory: {args.root}")
+        sys.exit(1)
+
+    cache = DiskCache(args.root)
+    if args.scan:
+        adopted = cache.scan(tuple(suffix.lower() for suffix in args.suffix) or None, args.pin)
+        print(f"🔍 Adopted {adopted} untracked files")
+    files, total, pinned = cache.usage()
+    print(f"🗄️  {args.root}: {files} tracked files, {format_size(total)} "
+          f"({format_size(pinned)} pinned){f', budget {format_size(args.budget)}' if args.budget else ''}")
+
+    if args.budget is not None and not args.stats:
+        evicted = cache.enforce(args.budget, dry_run=args.dry_run)
+        freed = sum(size for _, size in evicted)
+        for key, size in evicted[:20]:
+            print(f"    {'would evict' if args.dry_run else 'evicted'} {key} ({format_size(size)})")
+        if len(evicted) > 20:
+            print(f"    ... and {len(evicted) - 20} more")
+        print(f"{'📝 Would free' if args.dry_run else '🧹 Freed'} {format_size(freed)} "
+              f"in {len(evicted)} files")
+        if pinned > args.budget:
+            print(f"⚠️  Pinned files alone ({format_size(pinned)}) exceed the budget")
+    if not args.dry_run:
+        cache.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,172 +7,206 @@ Targets specific error patterns from tsc output
 import re
 import subprocess
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 BASE_DIR = Path("/Users/spencercarroll/pgclosets-store-main")
 
-def get_typescript_errors() -> List[Tuple[str, int, str]]:
-    """Run tsc and parse errors"""
-    result = subprocess.run(
-        ["npm", "run", "type-check"],
-        cwd=BASE_DIR,
-        capture_output=True,
-        text=True
-    )
-
-    errors = []
-    pattern = r'(.+?)\((\d+),\d+\): error (TS\d+): (.+)'
-
-    for line in result.stdout.split('\n'):
-        match = re.match(pattern, line)
-        if match:
-            filepath, line_num, error_code, message = match.groups()
-            errors.append((filepath, int(line_num), error_code, message))
+DIAGNOSTIC_RE = re.compile(r'(.+?)\((\d+),\d+\): error (TS\d+): (.+)')
 
-    return errors
+Diagnostic = Tuple[str, int, str, str]
 
-def fix_unused_variables(filepath: Path, line_num: int, var_name: str) -> bool:
+def parse_diagnostics(lines: Iterable[str]) -> Iterator[Diagnostic]:
+    """Parse tsc output line by line, yielding each error as soon as it is read"""
+    for line in lines:
+        match = DIAGNOSTIC_RE.match(line)
+        if match:
+            filepath, line_num, error_code, message = match.groups()
+            yield filepath, int(line_num), error_code, message
+
+def stream_typescript_errors(build_info: Optional[Path] = None,
+                             save_to: Optional[TextIO] = None) -> Iterator[Diagnostic]:
+    """Run an incremental tsc check and yield errors while it is still writing them"""
+    # tsconfig enables incremental builds; --incremental keeps that true even if
+    # it is turned off there, and --pretty false guarantees parseable output
+    command = ["npm", "run", "--silent", "type-check", "--", "--incremental", "--pretty", "false"]
+    if build_info:
+        command += ["--tsBuildInfoFile", str(build_info)]
+
+    def tee(lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            save_to.write(line)
+            yield line
+
+    with subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.PIPE, text=True) as process:
+        yield from parse_diagnostics(tee(process.stdout) if save_to else process.stdout)
+
+def get_typescript_errors(build_info: Optional[Path] = None) -> List[Diagnostic]:
+    """Run tsc and parse errors"""
+    return list(stream_typescript_errors(build_info))
+
+def group_by_file(errors: Iterable[Diagnostic]) -> Iterator[Tuple[str, List[Tuple[int, str, str]]]]:
+    """Batch consecutive errors per file; tsc reports each file's errors together"""
+    filepath, batch = None, []
+    for error_file, line_num, error_code, message in errors:
+        if error_file != filepath and batch:
+            yield filepath, batch
+            batch = []
+        filepath = error_file
+        batch.append((line_num, error_code, message))
+    if batch:
+        yield filepath, batch
+
+# Every fix rewrites only the text of the line tsc reported and never adds or
+# removes lines, so edits on different lines cannot overlap and line numbers
+# stay valid while a file's edits are applied in one pass.
+
+def fix_unused_variables(line: str, var_name: str) -> str:
     """Fix unused variable by prefixing with underscore or removing"""
-    try:
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
-
-        if line_num > len(lines):
-            return False
-
-        line = lines[line_num - 1]
+    # Try to prefix with underscore
+    patterns = [
+        (rf'\b{var_name}\b', f'_{var_name}'),
+        (rf'const {var_name}', f'const _{var_name}'),
+        (rf'let {var_name}', f'let _{var_name}'),
+    ]
 
-        # Try to prefix with underscore
-        patterns = [
-            (rf'\b{var_name}\b', f'_{var_name}'),
-            (rf'const {var_name}', f'const _{var_name}'),
-            (rf'let {var_name}', f'let _{var_name}'),
-        ]
+    for pattern, replacement in patterns:
+        if re.search(pattern, line):
+            return re.sub(pattern, replacement, line, count=1)
 
-        for pattern, replacement in patterns:
-            if re.search(pattern, line):
-                lines[line_num - 1] = re.sub(pattern, replacement, line, count=1)
-                with open(filepath, 'w') as f:
-                    f.writelines(lines)
-                return True
+    return line
 
-        return False
-    except Exception as e:
-        print(f"Error fixing {filepath}:{line_num}: {e}")
-        return False
-
-def fix_possibly_undefined(filepath: Path, line_num: int) -> bool:
+def fix_possibly_undefined(line: str) -> str:
     """Fix 'Object is possibly undefined' errors"""
-    try:
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
+    # Add optional chaining or null check
+    # Pattern: object.property → object?.property
+    return re.sub(r'(\w+)\.(\w+)', r'\1?.\2', line, count=1)
 
-        if line_num > len(lines):
-            return False
+def fix_type_incompatibility(line: str, message: str) -> str:
+    """Fix type incompatibility errors"""
+    # Check if it's about optional properties
+    if 'exactOptionalPropertyTypes' in message:
+        # Add undefined to union type or fix optional property
+        # This requires AST manipulation - skip for now
+        return line
+
+    # Check if it's about string literals
+    if '"' in message and 'not assignable to type' in message:
+        # Extract expected type
+        match = re.search(r'Type \'([^\']+)\' is not assignable to type \'([^\']+)\'', message)
+        if match:
+            actual, expected = match.groups()
+            # Replace the value
+            return line.replace(f'"{actual}"', f'"{expected.split("|")[0].strip()}"')
 
-        line = lines[line_num - 1]
+    return line
 
-        # Add optional chaining or null check
-        # Pattern: object.property → object?.property
-        modified = re.sub(r'(\w+)\.(\w+)', r'\1?.\2', line, count=1)
+def fix_error(line: str, error_code: str, message: str) -> str:
+    """Apply the fix for one diagnostic to its line"""
+    if error_code == "TS6133":  # Unused variable
+        match = re.search(r"'(\w+)' is declared", message)
+        if match:
+            return fix_unused_variables(line, match.group(1))
 
-        if modified != line:
-            lines[line_num - 1] = modified
-            with open(filepath, 'w') as f:
-                f.writelines(lines)
-            return True
+    elif error_code == "TS2532":  # Possibly undefined
+        return fix_possibly_undefined(line)
 
-        return False
-    except Exception as e:
-        print(f"Error fixing {filepath}:{line_num}: {e}")
-        return False
+    elif error_code in ["TS2322", "TS2375"]:  # Type incompatibility
+        return fix_type_incompatibility(line, message)
 
-def fix_type_incompatibility(filepath: Path, line_num: int, message: str) -> bool:
-    """Fix type incompatibility errors"""
+    return line
+
+def fix_file_errors(filepath: Path, file_errors: List[Tuple[int, str, str]]) -> List[Tuple[int, str]]:
+    """Apply all of a file's fixes in one read/modify/write; return (line, code) of each fix"""
     try:
         with open(filepath, 'r') as f:
             lines = f.readlines()
 
-        if line_num > len(lines):
-            return False
-
-        line = lines[line_num - 1]
-
-        # Check if it's about optional properties
-        if 'exactOptionalPropertyTypes' in message:
-            # Add undefined to union type or fix optional property
-            # This requires AST manipulation - skip for now
-            return False
-
-        # Check if it's about string literals
-        if '"' in message and 'not assignable to type' in message:
-            # Extract expected type
-            match = re.search(r'Type \'([^\']+)\' is not assignable to type \'([^\']+)\'', message)
-            if match:
-                actual, expected = match.groups()
-                # Replace the value
-                modified = line.replace(f'"{actual}"', f'"{expected.split("|")[0].strip()}"')
-                if modified != line:
-                    lines[line_num - 1] = modified
-                    with open(filepath, 'w') as f:
-                        f.writelines(lines)
-                    return True
-
-        return False
+        fixed = []
+        # Same-line errors apply in tsc order, each to the line as already fixed
+        for line_num, error_code, message in file_errors:
+            if line_num > len(lines):
+                continue
+            modified = fix_error(lines[line_num - 1], error_code, message)
+            if modified != lines[line_num - 1]:
+                lines[line_num - 1] = modified
+                fixed.append((line_num, error_code))
+
+        if fixed:
+            with open(filepath, 'w') as f:
+                f.writelines(lines)
+        return fixed
     except Exception as e:
-        print(f"Error fixing {filepath}:{line_num}: {e}")
-        return False
+        print(f"Error fixing {filepath}: {e}")
+        return []
 
 def main():
+    global BASE_DIR
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Auto-fix common tsc errors')
+    parser.add_argument('--base-dir', type=Path, default=BASE_DIR,
+                        help=f'Project root to fix (default: {BASE_DIR})')
+    parser.add_argument('--diagnostics', '-d', type=argparse.FileType('r'),
+                        help="Replay saved tsc output instead of running tsc ('-' reads stdin)")
+    parser.add_argument('--save-diagnostics', type=argparse.FileType('w'),
+                        help='Also write the raw tsc output here, for later --diagnostics runs')
+    parser.add_argument('--build-info', type=Path,
+                        help='tsc build-info file (default: tsBuildInfoFile from tsconfig.json)')
+    parser.add_argument('--no-recheck', action='store_true',
+                        help='Skip the type check after fixing (e.g. when replaying offline)')
+    args = parser.parse_args()
+    BASE_DIR = args.base_dir
+
     print("🔍 Analyzing TypeScript errors...")
 
-    errors = get_typescript_errors()
-    print(f"📊 Found {len(errors)} TypeScript errors")
+    # Fixing starts with the first file's errors, while tsc (or the pipe) is still writing
+    if args.diagnostics:
+        errors = parse_diagnostics(args.diagnostics)
+    else:
+        errors = stream_typescript_errors(args.build_info, args.save_diagnostics)
 
     # Group errors by type
     error_types: Dict[str, int] = {}
-    for _, _, error_code, _ in errors:
-        error_types[error_code] = error_types.get(error_code, 0) + 1
 
-    print("\n📈 Error breakdown:")
-    for error_code, count in sorted(error_types.items(), key=lambda x: -x[1]):
-        print(f"  {error_code}: {count}")
+    def counted(errors: Iterable[Diagnostic]) -> Iterator[Diagnostic]:
+        for error in errors:
+            error_types[error[2]] = error_types.get(error[2], 0) + 1
+            yield error
 
     # Fix specific error types
     fixed_count = 0
 
     print("\n🔧 Fixing errors...")
 
-    for filepath, line_num, error_code, message in errors[:100]:  # Limit to first 100
+    for filepath, file_errors in group_by_file(counted(errors)):
         full_path = BASE_DIR / filepath
 
         if not full_path.exists():
             continue
 
-        fixed = False
+        for line_num, error_code in fix_file_errors(full_path, file_errors):
+            fixed_count += 1
+            print(f"✅ Fixed {filepath}:{line_num} ({error_code})")
 
-        if error_code == "TS6133":  # Unused variable
-            match = re.search(r"'(\w+)' is declared", message)
-            if match:
-                var_name = match.group(1)
-                fixed = fix_unused_variables(full_path, line_num, var_name)
+    total = sum(error_types.values())
+    print(f"\n📊 Found {total} TypeScript errors")
 
-        elif error_code == "TS2532":  # Possibly undefined
-            fixed = fix_possibly_undefined(full_path, line_num)
+    print("\n📈 Error breakdown:")
+    for error_code, count in sorted(error_types.items(), key=lambda x: -x[1]):
+        print(f"  {error_code}: {count}")
 
-        elif error_code in ["TS2322", "TS2375"]:  # Type incompatibility
-            fixed = fix_type_incompatibility(full_path, line_num, message)
+    print(f"\n✨ Auto-fixed {fixed_count} errors")
 
-        if fixed:
-            fixed_count += 1
-            print(f"✅ Fixed {filepath}:{line_num} ({error_code})")
+    if args.save_diagnostics:
+        args.save_diagnostics.close()
 
-    print(f"\n✨ Auto-fixed {fixed_count} errors")
+    if args.no_recheck:
+        return
 
-    # Re-run type check
+    # Re-run type check; incremental, so only files affected by the fixes are rechecked
     print("\n🔍 Running type check again...")
-    errors_after = get_typescript_errors()
-    print(f"📊 Remaining errors: {len(errors_after)} (reduced by {len(errors) - len(errors_after)})")
+    errors_after = get_typescript_errors(args.build_info)
+    print(f"📊 Remaining errors: {len(errors_after)} (reduced by {total - len(errors_after)})")
 
 if __name__ == "__main__":
     main()
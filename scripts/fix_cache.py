@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Persistent "known clean" cache for the TypeScript fixer scripts
+
+Remembers files a fixer left unchanged, keyed by path with size and mtime,
+plus a SHA-256 of the bytes as a fallback when only the mtime moved (git
+checkout, touch). The whole cache is tied to a hash of the fixer's rules, so
+changing a rule reprocesses everything.
+
+Stored in <project>/.fixer-cache/<fixer>.json.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+CACHE_DIR = ".fixer-cache"
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class FixCache:
+    """Files known to be clean under one fixer's current rules"""
+
+    def __init__(self, root: Path, name: str, rules_hash: str):
+        self.root = root
+        self.path = root / CACHE_DIR / f"{name}.json"
+        self.rules_hash = rules_hash
+        self.files = {}  # relative path -> [size, mtime_ns, sha256]
+
+        if self.path.exists():
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('rules') == rules_hash:
+                    self.files = data['files']
+            except (ValueError, KeyError):
+                pass  # Corrupt cache: start over
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    def is_clean(self, path: Path) -> bool:
+        """True if path is unchanged since a run found nothing to fix in it"""
+        entry = self.files.get(self._key(path))
+        if entry is None:
+            return False
+        size, mtime_ns, digest = entry
+        stat = path.stat()
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        if file_digest(path) == digest:
+            entry[1] = stat.st_mtime_ns
+            return True
+        return False
+
+    def mark_clean(self, path: Path):
+        stat = path.stat()
+        self.files[self._key(path)] = [stat.st_size, stat.st_mtime_ns, file_digest(path)]
+
+    def save(self):
+        self.path.parent.mkdir(exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rules': self.rules_hash, 'files': self.files}, f)
+        tmp_path.replace(self.path)
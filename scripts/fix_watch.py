@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Debounced change batches for the fixers' watch mode
+
+Uses watchdog's native filesystem events (inotify, FSEvents, ...) when it is
+installed, else polls the tree with the ts_walk walker and compares
+mtime/size. Either way, changes are gathered until the tree has been quiet
+for the debounce interval and then handed over as one batch, so an editor's
+save (or a git checkout) is fixed once rather than once per write.
+"""
+
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Set, Tuple
+
+from ts_walk import TS_SUFFIXES, IgnoreMatcher, walk_ts_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+WRITE_EVENTS = {'created', 'modified', 'moved', 'closed'}
+
+
+def _scan(root: Path) -> Dict[Path, Tuple[int, int]]:
+    signatures = {}
+    for path in walk_ts_files(root):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def _start_polling(root: Path, changes: queue.Queue, interval: float) -> Callable[[], None]:
+    stopped = threading.Event()
+
+    def poll():
+        previous = _scan(root)
+        while not stopped.wait(interval):
+            current = _scan(root)
+            changed = {path for path, signature in current.items() if previous.get(path) != signature}
+            previous = current
+            if changed:
+                changes.put(changed)
+
+    threading.Thread(target=poll, daemon=True).start()
+    return stopped.set
+
+
+def _start_watchdog(root: Path, changes: queue.Queue) -> Callable[[], None]:
+    # Events arrive for every path; keep what the walker would have yielded
+    matcher = IgnoreMatcher(root)
+
+    def wanted(path: str) -> bool:
+        if not path.endswith(TS_SUFFIXES):
+            return False
+        rel_path = os.path.relpath(path, root).replace(os.sep, '/')
+        return not rel_path.startswith('../') and not matcher.ignored(rel_path)
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            # Reads raise opened/closed_no_write events too; they must not hold off the debounce
+            if event.is_directory or event.event_type not in WRITE_EVENTS:
+                return
+            paths = {Path(p) for p in (event.src_path, getattr(event, 'dest_path', '')) if p and wanted(p)}
+            if paths:
+                changes.put(paths)
+
+    observer = Observer()
+    observer.schedule(Handler(), str(root), recursive=True)
+    observer.start()
+
+    def stop():
+        observer.stop()
+        observer.join()
+    return stop
+
+
+def watch_ts_changes(root: Path, debounce: float = 0.1, poll_interval: float = 0.25,
+                     polling: bool = False) -> Iterator[Set[Path]]:
+    """Yield sets of changed .ts/.tsx files under root, forever, one per quiet period"""
+    changes = queue.Queue()
+    if WATCHDOG_AVAILABLE and not polling:
+        stop = _start_watchdog(root, changes)
+    else:
+        stop = _start_polling(root, changes, poll_interval)
+    try:
+        while True:
+            batch = set(changes.get())
+            while True:
+                try:
+                    batch |= changes.get(timeout=debounce)
+                except queue.Empty:
+                    break
+            batch = {path for path in batch if path.is_file()}
+            if batch:
+                yield batch
+    finally:
+        stop()
+
+
+def describe_backend(polling: bool = False) -> str:
+    if WATCHDOG_AVAILABLE and not polling:
+        return "filesystem events"
+    return "polling" + ("" if polling else " (pip install watchdog for native events)")
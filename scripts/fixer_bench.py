@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark the TypeScript fixer scripts on synthetic source trees
+
+Builds a .ts/.tsx tree with a controllable count of every pattern the fixers
+target (plus a fake node_modules they must leave alone and, optionally,
+multi-megabyte generated files), then runs nuclear-fix.py,
+comprehensive-fix.py and fix-typescript-errors.py on fresh copies of it and
+records files/s, MB/s, peak memory and per-rule time.
+
+Usage:
+    python scripts/fixer_bench.py --files 10000
+    python scripts/fixer_bench.py --files 200 --big-files 2 --big-mb 4 --mix filler=10,console_object=5
+    python scripts/fixer_bench.py --files 10000 --output bench.json   # compare runs over time
+"""
+
+import importlib.util
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Pattern -> (source lines for occurrence i, tsc diagnostic for its first line or None)
+PATTERNS = {
+    'filler': (lambda i: [f'export const value{i} = compute({i}, "text")'], None),
+    'import_type': (lambda i: ['import { Metadata } from "next"'], None),
+    'next_request': (lambda i: ['import { NextRequest, NextResponse } from "next/server"'], None),
+    'split_trim': (lambda i: [f'const first{i} = header.split(",")[0].trim()'], None),
+    'user_agent': (lambda i: [f'const agent{i} = request.headers.get("user-agent")'], None),
+    'console_log': (lambda i: [f'  console.log("event", value{i})'], None),
+    'console_object': (lambda i: ['  console.log("event", {', f'    id: {i},', '    name: "x",', '  })'], None),
+    'commented_console': (lambda i: ['  // console.log("event", {', f'    id: {i},', '  })'], None),
+    'variant': (lambda i: ['<Text variant="body" />'],
+                ('TS2322', "Type 'body' is not assignable to type '\"secondary\" | \"primary\"'.")),
+    'lazy_image': (lambda i: ['<img loading="lazy" fetchpriority="high" />'], None),
+    'unused_var': (lambda i: [f'const unused{i} = {i}'],
+                   ('TS6133', "'unused{i}' is declared but its value is never read.")),
+    'possibly_undefined': (lambda i: [f'const size{i} = maybe.value'],
+                           ('TS2532', "Object is possibly 'undefined'.")),
+}
+DEFAULT_MIX = {name: 1 for name in PATTERNS}
+DEFAULT_MIX['filler'] = 40
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """'filler=10,console_object=3' -> counts per file, defaults for the rest"""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, text.split(',')):
+        name, _, count = item.partition('=')
+        if name not in PATTERNS:
+            raise SystemExit(f"Unknown pattern {name!r}; choose from {', '.join(PATTERNS)}")
+        mix[name] = int(count)
+    return mix
+
+
+def render_file(mix: Dict[str, int], rel_path: str, rng: random.Random,
+                diagnostics: List[str], target_bytes: int = 0) -> str:
+    """One source file with mix's pattern counts in random order (repeated up to target_bytes)"""
+    lines = []
+    size = 0
+    occurrence = 0
+    while True:
+        blocks = [name for name, count in mix.items() for _ in range(count)]
+        rng.shuffle(blocks)
+        for name in blocks:
+            make_lines, diagnostic = PATTERNS[name]
+            block = make_lines(occurrence)
+            if diagnostic:
+                code, message = diagnostic
+                diagnostics.append(f"{rel_path}({len(lines) + 1},7): error {code}: {message.format(i=occurrence)}")
+            lines.extend(block)
+            size += sum(len(line) + 1 for line in block)
+            occurrence += 1
+        if size >= target_bytes:
+            return '\n'.join(lines) + '\n'
+
+
+def generate_tree(root: Path, files: int, mix: Dict[str, int], node_modules: int,
+                  big_files: int, big_mb: float, seed: int) -> Dict:
+    """Write the synthetic project; return its stats"""
+    rng = random.Random(seed)
+    diagnostics = []
+    total_bytes = 0
+
+    sources = [f"src/d{i % 50}/s{i % 7}/f{i}.{'tsx' if i % 2 else 'ts'}" for i in range(files)]
+    sources += [f"generated/big{i}.ts" for i in range(big_files)]
+    for index, rel_path in enumerate(sources):
+        target = int(big_mb * 1024 * 1024) if index >= files else 0
+        content = render_file(mix, rel_path, rng, diagnostics, target)
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+        total_bytes += len(content.encode('utf-8'))
+
+    # Same patterns under node_modules: every fixer must skip them
+    for i in range(node_modules):
+        path = root / f"node_modules/pkg{i % 500}/dist/m{i}.d.ts"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(render_file(mix, str(path), rng, []), encoding='utf-8')
+
+    (root / 'package.json').write_text('{"scripts": {"type-check": "true"}}\n')
+    (root / 'tsc-output.txt').write_text('\n'.join(diagnostics) + '\n')
+    return {'files': len(sources), 'bytes': total_bytes, 'diagnostics': len(diagnostics)}
+
+
+def snapshot(root: Path) -> Dict[str, Tuple[int, int]]:
+    return {str(path): (path.stat().st_size, path.stat().st_mtime_ns) for path in root.rglob('*') if path.is_file()}
+
+
+def run_fixer(command: List[str], cwd: Path) -> Tuple[float, int, int]:
+    """Run a fixer; return wall seconds, peak RSS in KB and exit status"""
+    # stderr goes to a file: nobody reads a pipe until wait4 returns, so a full one would deadlock
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            stderr.seek(0)
+            print(stderr.read().decode(errors='replace'), file=sys.stderr)
+    # ru_maxrss is in KB on Linux but in bytes on macOS
+    peak_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return elapsed, peak_kb, process.returncode
+
+
+def load_script(name: str):
+    """Import a hyphenated fixer script as a module"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def profile_rules(tree: Path) -> Dict[str, Dict[str, float]]:
+    """Seconds spent in each rule, measured in-process over the tree's sources"""
+    contents = {path: path.read_text(encoding='utf-8') for path in sorted((tree / 'src').rglob('*.ts*'))}
+    contents.update({path: path.read_text(encoding='utf-8') for path in (tree / 'generated').glob('*.ts')})
+
+    comprehensive = load_script('comprehensive-fix')
+    timings = Counter()
+    for content in contents.values():
+        comprehensive.RULES.apply(content, timings)
+    rule_times = {comprehensive.RULES.describe(index): timings[index] for index in range(len(comprehensive.RULES.rules))}
+
+    nuclear = load_script('nuclear-fix')
+    start = time.perf_counter()
+    for content in contents.values():
+        nuclear.fix_commented_console_logs(content)
+    nuclear_times = {'fix_commented_console_logs': time.perf_counter() - start}
+
+    fixer = load_script('fix-typescript-errors')
+    lines = {path: content.splitlines(keepends=True) for path, content in contents.items()}
+    with open(tree / 'tsc-output.txt', encoding='utf-8') as f:
+        errors = list(fixer.parse_diagnostics(f))
+    error_times = Counter()
+    for filepath, line_num, error_code, message in errors:
+        line = lines[tree / filepath][line_num - 1]
+        start = time.perf_counter()
+        fixer.fix_error(line, error_code, message)
+        error_times[error_code] += time.perf_counter() - start
+
+    return {'comprehensive-fix': rule_times, 'nuclear-fix': nuclear_times,
+            'fix-typescript-errors': dict(error_times)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the TypeScript fixers on a synthetic tree')
+    parser.add_argument('--files', '-f', type=int, default=2000, help='Source files (default: 2000)')
+    parser.add_argument('--mix', default='',
+                        help=f"Per-file pattern counts, e.g. filler=10,console_object=3 ({', '.join(PATTERNS)})")
+    parser.add_argument('--node-modules', type=int, default=2000,
+                        help='Files in the fake node_modules (default: 2000)')
+    parser.add_argument('--big-files', type=int, default=0, help='Extra multi-megabyte generated files')
+    parser.add_argument('--big-mb', type=float, default=4, help='Size of each big file in MB (default: 4)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='--jobs for comprehensive-fix (default: 1)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', type=Path, help='Generate the tree here and keep it')
+    parser.add_argument('--output', '-o', type=Path, help='Write results as JSON')
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix='fixer-bench-'))
+    template = args.keep or work / 'template'
+    try:
+        print(f"🏗️  Generating {args.files} files (+{args.big_files} × {args.big_mb} MB, "
+              f"{args.node_modules} in node_modules)...")
+        stats = generate_tree(template, args.files, parse_mix(args.mix), args.node_modules,
+                              args.big_files, args.big_mb, args.seed)
+        megabytes = stats['bytes'] / (1024 * 1024)
+        print(f"📁 {stats['files']} files, {megabytes:.1f} MB, {stats['diagnostics']} diagnostics")
+
+        fixers = {
+            'nuclear-fix': lambda tree: ['nuclear-fix.py', '--base-dir', tree, '--no-cache'],
+            'comprehensive-fix': lambda tree: ['comprehensive-fix.py', '--base-dir', tree, '--no-cache',
+                                               '--no-type-check', '--jobs', str(args.jobs)],
+            'fix-typescript-errors': lambda tree: ['fix-typescript-errors.py', '--base-dir', tree, '--diagnostics',
+                                                   str(Path(tree) / 'tsc-output.txt'), '--no-recheck'],
+        }
+        results = {}
+        for name, command in fixers.items():
+            tree = work / name
+            shutil.copytree(template, tree)
+            node_modules_before = snapshot(tree / 'node_modules')
+            script, *fixer_args = command(str(tree))
+            elapsed, peak_kb, status = run_fixer([sys.executable, str(SCRIPTS_DIR / script), *fixer_args],
+                                                 SCRIPTS_DIR)
+            results[name] = {
+                'seconds': elapsed,
+                'files_per_second': stats['files'] / elapsed,
+                'mb_per_second': megabytes / elapsed,
+                'peak_rss_mb': peak_kb / 1024,
+                'exit_status': status,
+                'node_modules_touched': snapshot(tree / 'node_modules') != node_modules_before,
+            }
+            shutil.rmtree(tree)
+            result = results[name]
+            print(f"{'✅' if status == 0 and not result['node_modules_touched'] else '❌'} {name:22s} "
+                  f"{elapsed:7.2f}s  {result['files_per_second']:8.0f} files/s  "
+                  f"{result['mb_per_second']:6.1f} MB/s  {result['peak_rss_mb']:6.0f} MB peak"
+                  + ("  (touched node_modules!)" if result['node_modules_touched'] else ""))
+
+        print("\n⏱️  Per-rule time (in-process):")
+        rule_times = profile_rules(template)
+        for name, times in rule_times.items():
+            print(f"  {name}")
+            for rule, seconds in sorted(times.items(), key=lambda item: -item[1]):
+                print(f"    {seconds * 1000:9.1f} ms  {rule}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'params': {key: str(value) if isinstance(value, Path) else value
+                                      for key, value in vars(args).items()},
+                           'tree': stats, 'python': sys.version.split()[0],
+                           'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'runs': results, 'rule_seconds': rule_times}, f, indent=2)
+            print(f"\n💾 Results saved to {args.output}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Canonical image-URL index shared by the Renin scrapers
+
+The same upload shows up as foo.jpg, foo-300x200.jpg, foo.jpg?v=3,
+http://renin.com/... and Jetpack's i0.wp.com/www.renin.com/... depending on
+the page and the scraper. canonical_image_url() folds those into one key,
+and ImageIndex remembers which local file already holds each key, so a
+scraper can copy that file instead of fetching the image again.
+
+Each size variant saved is kept under its canonical URL: a request is
+served by the original upload or a variant at least as large, never by a
+thumbnail (or, with exact=True, only by the same variant).
+
+Stored in <project>/.scraper-cache/image-index.json.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+INDEX_PATH = Path(__file__).resolve().parent.parent / ".scraper-cache" / "image-index.json"
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+SIZE_SUFFIX_RE = re.compile(r'-(\d+)x(\d+)(?=\.(?:jpe?g|png|gif|webp)$)', re.I)
+
+# Hosts serving the same files as www.renin.com
+CANONICAL_HOSTS = {'renin.com': 'www.renin.com'}
+# Jetpack/Photon CDN: https://i0.wp.com/<origin host>/<path>?resize=W,H
+PHOTON_HOST_RE = re.compile(r'^i\d\.wp\.com$')
+
+Size = Optional[Tuple[int, int]]  # None = the original upload
+
+
+def _split(url: str) -> Tuple[str, str, dict]:
+    """(host, path, query) with CDN hosts resolved to the origin"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    path = parts.path
+    if PHOTON_HOST_RE.match(host):
+        origin, _, rest = path.lstrip('/').partition('/')
+        host, path = origin.lower().partition(':')[0], '/' + rest
+    return CANONICAL_HOSTS.get(host, host), path, parse_qs(parts.query)
+
+
+def is_image_url(url: str) -> bool:
+    return _split(url)[1].lower().endswith(IMAGE_EXTENSIONS)
+
+
+def canonical_image_url(url: str) -> str:
+    """One key per upload: https, origin host, no query or size suffix"""
+    host, path, _ = _split(url)
+    return f"https://{host}{SIZE_SUFFIX_RE.sub('', path)}"
+
+
+def requested_size(url: str) -> Size:
+    """Pixel box a URL asks for: its -WxH suffix or Photon resize/fit, None for the original"""
+    _, path, query = _split(url)
+    match = SIZE_SUFFIX_RE.search(path)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    for key in ('resize', 'fit'):
+        values = query.get(key, [''])[0].split(',')
+        if len(values) == 2 and all(value.isdigit() for value in values):
+            return int(values[0]), int(values[1])
+    return None
+
+
+def _variant(size: Size) -> str:
+    return 'original' if size is None else f"{size[0]}x{size[1]}"
+
+
+def _size(variant: str) -> Size:
+    if variant == 'original':
+        return None
+    width, height = variant.split('x')
+    return int(width), int(height)
+
+
+def variant_key(url: str) -> str:
+    """canonical_image_url() plus the size variant: equal only for the same pixels"""
+    return f"{canonical_image_url(url)}#{_variant(requested_size(url))}"
+
+
+def _covers(have: Size, want: Size) -> bool:
+    """A saved variant of size have can stand in for a request of size want"""
+    if have is None:
+        return True
+    return want is not None and have[0] >= want[0] and have[1] >= want[1]
+
+
+class ImageIndex:
+    """Canonical image URL -> local files holding its variants, shared across scrapers and runs
+
+    Thread-safe. save() merges with entries other scrapers saved meanwhile.
+    path=None keeps the index in memory only (dedup within one run).
+    """
+
+    def __init__(self, path: Optional[Path] = INDEX_PATH):
+        self.path = Path(path) if path else None
+        self.entries = {}  # canonical URL -> {'original' | 'WxH': [local path, source URL, bytes]}
+        self.updates = {}
+        self.lock = threading.Lock()
+        if self.path:
+            self.entries = self._read()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Missing or corrupt: start over
+
+    def lookup(self, url: str, exact: bool = False) -> Optional[Path]:
+        """Local file already holding this image
+
+        Any saved variant at least as large will do (the original first, then
+        the smallest that covers the request) unless exact asks for the same
+        size variant, as a mirror serving pixel-exact srcset entries needs.
+        """
+        want = requested_size(url)
+        with self.lock:
+            variants = dict(self.entries.get(canonical_image_url(url), {}))
+        if exact:
+            candidates = [variants.get(_variant(want))]
+        else:
+            covering = [(_size(variant), entry) for variant, entry in variants.items()
+                        if _covers(_size(variant), want)]
+            covering.sort(key=lambda item: (item[0] is not None, item[0] and item[0][0] * item[0][1]))
+            candidates = [entry for _, entry in covering]
+
+        for entry in candidates:
+            if entry is None:
+                continue
+            local_path, _, size = entry
+            try:
+                if os.stat(local_path).st_size == size:
+                    return Path(local_path)
+            except OSError:
+                pass  # Deleted since it was recorded
+        return None
+
+    def record(self, url: str, local_path: Path):
+        """Note that local_path holds url's image (the size variant the URL asks for)"""
+        local_path = Path(local_path).resolve()
+        entry = [str(local_path), url, local_path.stat().st_size]
+        key = canonical_image_url(url)
+        variant = _variant(requested_size(url))
+        with self.lock:
+            self.entries.setdefault(key, {})[variant] = entry
+            self.updates.setdefault(key, {})[variant] = entry
+
+    def copy_to(self, url: str, dest: Path, exact: bool = False) -> bool:
+        """Copy the indexed file for url to dest; False if there is none"""
+        source = self.lookup(url, exact)
+        if source is None:
+            return False
+        dest = Path(dest)
+        if source.resolve() != dest.resolve():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            # Never overwrite dest in place: it may be hardlinked into public/ (media_sync.py --link)
+            tmp_path = dest.with_name(dest.name + '.part')
+            shutil.copyfile(source, tmp_path)
+            tmp_path.replace(dest)
+        return True
+
+    def save(self):
+        if not self.path or not self.updates:
+            return
+        with self.lock:
+            entries = self._read()
+            for key, variants in self.updates.items():
+                entries.setdefault(key, {}).update(variants)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=0, sort_keys=True)
+            tmp_path.replace(self.path)
+            self.entries = entries
+            self.updates = {}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Image header probing
+
+Reads the format and pixel size of PNG, JPEG, GIF and WebP images from their
+first bytes, and fetches only those bytes with an HTTP Range request, so a
+scraper can drop icons and placeholders before downloading them in full.
+"""
+
+import struct
+from typing import Callable, NamedTuple, Optional, Tuple
+
+FIRST_BYTES = 4 * 1024
+MAX_BYTES = 128 * 1024  # JPEG EXIF/ICC blocks can push the size marker this far
+
+# JPEG start-of-frame markers (carry the size); C4, C8 and CC are other segments
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class ImageInfo(NamedTuple):
+    format: Optional[str]       # 'jpeg', 'png', 'gif', 'webp' or None if unrecognized
+    width: Optional[int]
+    height: Optional[int]
+    total_size: Optional[int]   # Full size in bytes, when the server said
+    data: bytes                 # The bytes read to find this out
+
+    @property
+    def complete(self) -> bool:
+        """data is the whole file, so no second request is needed"""
+        return self.total_size is not None and len(self.data) >= self.total_size
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8'):
+        return 'jpeg'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None  # Corrupt marker stream
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # Fill byte
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2  # Markers without a length
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from an image's leading bytes, or None if not there (yet)"""
+    image_format = sniff_format(data)
+    if image_format == 'png' and len(data) >= 24 and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+    if image_format == 'gif' and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if image_format == 'jpeg':
+        return _jpeg_size(data)
+    if image_format == 'webp' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and data[23:26] == b'\x9d\x01\x2a':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and data[20] == 0x2F:
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+
+def image_info(data: bytes, total_size: Optional[int] = None) -> ImageInfo:
+    """ImageInfo for bytes already in hand (the whole file unless total_size says otherwise)"""
+    size = image_dimensions(data)
+    return ImageInfo(sniff_format(data), *(size or (None, None)),
+                     len(data) if total_size is None else total_size, data)
+
+
+def _validator(response) -> Optional[str]:
+    """Strong ETag, else Last-Modified: what If-Range may carry (weak ETags are not allowed)"""
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _range_headers(start: int, end: str, validator: Optional[str]) -> dict:
+    """Range header for bytes start-end, plus If-Range so a changed file comes back whole (200)"""
+    headers = {'Range': f'bytes={start}-{end}'}
+    if validator:
+        headers['If-Range'] = validator
+    return headers
+
+
+def probe_remote_image(session, url: str, keep: Optional[Callable[[ImageInfo], bool]] = None,
+                       timeout: int = 30, first_bytes: int = FIRST_BYTES,
+                       max_bytes: int = MAX_BYTES) -> ImageInfo:
+    """Format and size of a remote image from a Range request for its first bytes
+
+    Asks for first_bytes, and for more (up to max_bytes) only while a JPEG's
+    size marker hasn't shown up. Servers that ignore Range answer 200 with the
+    whole file; only the prefix is read before deciding. If keep(info) says
+    the image is wanted, the rest is fetched too (the same 200 stream read on,
+    or a Range request for the remainder), so data holds the complete file and
+    nothing is transferred twice. Follow-up ranges carry If-Range, so an image
+    replaced in between comes back whole rather than spliced onto the old
+    prefix. Raises on HTTP errors like session.get would.
+    """
+    data = b''
+    total_size = None
+    validator = None
+    want = first_bytes
+    while True:
+        response = session.get(url, headers=_range_headers(len(data), str(want - 1), validator),
+                               stream=True, timeout=timeout)
+        try:
+            if response.status_code == 416:
+                # Empty file or no byte ranges at all: nothing to probe, let the caller fetch normally
+                return ImageInfo(None, None, None, None, b'')
+            response.raise_for_status()
+            validator = _validator(response)
+            ranged = response.status_code == 206
+            if ranged:
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                total_size = int(total) if total.isdigit() else None
+                data += response.raw.read(want - len(data), decode_content=True)
+                if len(data) < want:
+                    total_size = len(data)  # Short read: the file ended, whatever Content-Range said
+            else:
+                # Range ignored, or If-Range saw a changed file: this is the whole file from byte 0
+                length = response.headers.get('Content-Length')
+                total_size = int(length) if length and length.isdigit() else None
+                data = response.raw.read(want, decode_content=True)
+                if len(data) < want:
+                    total_size = len(data)
+
+            info = ImageInfo(sniff_format(data), *(image_dimensions(data) or (None, None)), total_size, data)
+            if info.width is None and info.format == 'jpeg' and want < max_bytes and not info.complete:
+                want = min(want * 4, max_bytes)
+                continue
+            if info.complete or keep is None or not keep(info):
+                return info
+            if not ranged:
+                # Range ignored: the body is already on its way, read on rather than refetch
+                return info._replace(data=data + response.raw.read(decode_content=True))
+        finally:
+            response.close()
+        break
+
+    response = session.get(url, headers=_range_headers(len(data), '', validator), timeout=timeout)
+    response.raise_for_status()
+    # Only a 206 continues our prefix; a 200 (changed file) is the whole new one
+    data = data + response.content if response.status_code == 206 else response.content
+    return info._replace(data=data, total_size=len(data))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Batch quality gate for harvested images
+
+Catches the blank placeholders, heavily blurred crops and near-solid swatches
+a harvest picks up. Images are decoded at reduced size (JPEG draft mode
+scales in the DCT), squeezed to SAMPLE_SIZE x SAMPLE_SIZE grayscale and
+scored a chunk at a time as one NumPy array:
+
+- sharpness: variance of the Laplacian over the image's own variance, so
+  low-contrast photos are not mistaken for blurred ones (low = blurred)
+- entropy: bits per pixel of the brightness histogram (low = flat, posterised)
+- uniformity: share of pixels in the most common 16-level brightness band
+  (high = blank or a solid swatch)
+
+Failures are listed in <root>/.quality-report.json and, with --quarantine,
+moved to <root>/.quarantine/. Both are dot-names, which media_sync.py and
+verify_images.py skip, so neither reaches public/. Both scrapers run this
+after their downloads with --quality-gate.
+
+Usage:
+    python scripts/image_quality.py renin_images
+    python scripts/image_quality.py renin_images --quarantine
+    python scripts/image_quality.py public/images --min-sharpness 0.02
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+SAMPLE_SIZE = 256  # At 128 a heavy blur is under a pixel and barely moves the Laplacian
+CHUNK_SIZE = 64  # ~50 MB of float32 working arrays per chunk
+BAND_LEVELS = 16
+
+# Calibrated on public/images: every photo and product-on-white shot passes, the grey
+# placeholder tiles fail (so does pg-logo-white.png, blank once flattened onto white),
+# and so does a Gaussian blur of sigma 8 px per 1200 px
+MIN_SHARPNESS = 0.01
+MIN_ENTROPY = 0.75
+MAX_UNIFORMITY = 0.97
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+# Hidden, so media_sync.py never promotes rejects or the report into public/
+QUARANTINE_DIR = '.quarantine'
+REPORT_FILE = '.quality-report.json'
+
+
+class QualityScore(NamedTuple):
+    path: str
+    sharpness: float
+    entropy: float
+    uniformity: float
+    failures: Tuple[str, ...]
+
+
+def load_sample(path) -> Optional[np.ndarray]:
+    """SAMPLE_SIZE x SAMPLE_SIZE grayscale pixels, transparency flattened onto white; None if unreadable"""
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (SAMPLE_SIZE, SAMPLE_SIZE))  # JPEG only: decode at 1/2 to 1/8 scale
+            if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+                img = img.convert('RGBA').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+                img = Image.alpha_composite(Image.new('RGBA', img.size, 'white'), img)
+            return np.asarray(img.convert('L').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def score_batch(samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(sharpness, entropy, uniformity) for an (N, height, width) uint8 stack"""
+    count, pixels = len(samples), samples[0].size
+    x = samples.astype(np.float32)
+    laplacian = (x[:, :-2, 1:-1] + x[:, 2:, 1:-1] + x[:, 1:-1, :-2] + x[:, 1:-1, 2:]
+                 - 4 * x[:, 1:-1, 1:-1])
+    sharpness = laplacian.reshape(count, -1).var(axis=1) / np.maximum(x.reshape(count, -1).var(axis=1), 1.0)
+
+    # One bincount for every histogram in the chunk: image i's values land in bins i*256..i*256+255
+    offsets = np.arange(count, dtype=np.int64)[:, None] * 256
+    histograms = np.bincount((samples.reshape(count, -1) + offsets).ravel(),
+                             minlength=count * 256).reshape(count, 256)
+    p = histograms / pixels
+    entropy = -(p * np.log2(np.where(p > 0, p, 1))).sum(axis=1)
+
+    cumulative = np.concatenate([np.zeros((count, 1), dtype=np.int64), histograms.cumsum(axis=1)], axis=1)
+    uniformity = (cumulative[:, BAND_LEVELS:] - cumulative[:, :-BAND_LEVELS]).max(axis=1) / pixels
+    return sharpness, entropy, uniformity
+
+
+def score_images(paths: Iterable, chunk_size: int = CHUNK_SIZE, workers: Optional[int] = None,
+                 min_sharpness: float = MIN_SHARPNESS, min_entropy: float = MIN_ENTROPY,
+                 max_uniformity: float = MAX_UNIFORMITY) -> Iterator[QualityScore]:
+    """Score images a chunk at a time; decoding runs in a thread pool (PIL releases the GIL)"""
+    paths = [str(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=workers or min(16, (os.cpu_count() or 1) * 2)) as pool:
+        for start in range(0, len(paths), chunk_size):
+            chunk = paths[start:start + chunk_size]
+            samples = list(pool.map(load_sample, chunk))
+            readable = [sample for sample in samples if sample is not None]
+            scores = iter(zip(*score_batch(np.stack(readable)))) if readable else iter(())
+
+            for path, sample in zip(chunk, samples):
+                if sample is None:
+                    yield QualityScore(path, 0.0, 0.0, 1.0, ('unreadable',))
+                    continue
+                sharpness, entropy, uniformity = map(float, next(scores))
+                failures = []
+                if uniformity > max_uniformity:
+                    failures.append('blank')
+                if entropy < min_entropy:
+                    failures.append('low-entropy')
+                if sharpness < min_sharpness:
+                    failures.append('blurry')
+                yield QualityScore(path, round(sharpness, 4), round(entropy, 2), round(uniformity, 3),
+                                   tuple(failures))
+
+
+def find_images(root: Path) -> List[Path]:
+    """Images under root, skipping hidden directories such as an earlier quarantine"""
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        found.extend(Path(directory) / filename for filename in sorted(filenames)
+                     if filename.lower().endswith(IMAGE_SUFFIXES))
+    return found
+
+
+def gate_images(paths: Iterable, root: Path, quarantine: bool = False, **thresholds) -> List[QualityScore]:
+    """Score paths (files under root), record them in root's report and return the failures
+
+    quarantine moves failing files to root/.quarantine/, keeping their relative path.
+    """
+    root = Path(root)
+    report_path = root / REPORT_FILE
+    try:
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        report = {}
+
+    failed = []
+    for score in score_images(dict.fromkeys(map(str, paths)), **thresholds):
+        relative = os.path.relpath(score.path, root)
+        report[relative] = {'sharpness': score.sharpness, 'entropy': score.entropy,
+                            'uniformity': score.uniformity, 'failures': list(score.failures)}
+        if score.failures:
+            failed.append(score)
+            if quarantine:
+                destination = root / QUARANTINE_DIR / relative
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(score.path, destination)
+                report[relative]['quarantined'] = str(destination.relative_to(root))
+
+    tmp_path = report_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    tmp_path.replace(report_path)
+    return failed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Flag blank, blurred and near-solid images')
+    parser.add_argument('roots', nargs='+', type=Path, help='Image directories to score')
+    parser.add_argument('--quarantine', action='store_true',
+                        help=f'Move failures to <root>/{QUARANTINE_DIR}/ instead of only listing them')
+    parser.add_argument('--min-sharpness', type=float, default=MIN_SHARPNESS,
+                        help=f'Laplacian-to-image variance below which an image is blurry (default: {MIN_SHARPNESS})')
+    parser.add_argument('--min-entropy', type=float, default=MIN_ENTROPY,
+                        help=f'Histogram entropy in bits below which an image is flat (default: {MIN_ENTROPY})')
+    parser.add_argument('--max-uniformity', type=float, default=MAX_UNIFORMITY,
+                        help=f'Share of pixels in one brightness band above which an image is blank '
+                             f'(default: {MAX_UNIFORMITY})')
+    parser.add_argument('--workers', '-w', type=int, help='Decoding threads (default: 2 per core, max 16)')
+    args = parser.parse_args()
+
+    thresholds = {'min_sharpness': args.min_sharpness, 'min_entropy': args.min_entropy,
+                  'max_uniformity': args.max_uniformity, 'workers': args.workers}
+    exit_code = 0
+    for root in args.roots:
+        if not root.is_dir():
+            print(f"❌ Not a directory: {root}")
+            exit_code = 1
+            continue
+        paths = find_images(root)
+        start = time.perf_counter()
+        failed = gate_images(paths, root, quarantine=args.quarantine, **thresholds)
+        elapsed = time.perf_counter() - start
+        print(f"🔍 {root}: scored {len(paths)} images in {elapsed:.1f}s "
+              f"({len(paths) / max(elapsed, 1e-9) * 60:.0f}/min)")
+        for score in failed:
+            print(f"    {'🚫' if args.quarantine else '⚠️ '} {os.path.relpath(score.path, root)}: "
+                  f"{', '.join(score.failures)} (sharpness {score.sharpness}, entropy {score.entropy}, "
+                  f"uniformity {score.uniformity})")
+        print(f"{'✅' if not failed else '⚠️ '} {len(failed)} failed"
+              f"{f', moved to {root / QUARANTINE_DIR}' if failed and args.quarantine else ''}; "
+              f"scores in {root / REPORT_FILE}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
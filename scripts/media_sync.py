@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Differential media sync
+
+Promotes scraper output (renin_images/, public/renin, ...) into the live
+public/ tree, touching only files that changed since the last sync.
+
+Usage:
+    python scripts/media_sync.py renin_images public/images/renin
+    python scripts/media_sync.py renin_images public/images/renin --hash --delete
+
+Files are compared by size and mtime; with --hash, files whose size matches
+but mtime differs are compared by SHA-256 (destination hashes are cached in
+the manifest). Copies land atomically, so the live tree never serves a
+half-written image. --delete only removes files the manifest says a sync
+wrote; files already in place that match the source are left unmanaged.
+
+Files are copied by default. --link hardlinks them instead, so a synced file
+and its source are the same inode: anything that then rewrites the source in
+place silently changes (or truncates) the published file too. It is only safe
+for sources whose writers replace files through a temporary file and a
+rename, as the Renin scrapers, image_index.py and the quality gate (a move)
+do; never use it on a tree edited by other tools.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import concurrent.futures
+from pathlib import Path
+from typing import Dict, Optional
+
+MANIFEST_NAME = ".media-sync-manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_tree(root: Path) -> Dict[str, os.stat_result]:
+    """Relative path -> stat for every regular, non-hidden file under root"""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            if name.startswith('.'):
+                continue
+            path = Path(dirpath) / name
+            files[path.relative_to(root).as_posix()] = path.stat()
+    return files
+
+
+def load_manifest(dest: Path) -> Dict[str, Dict]:
+    manifest_path = dest / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(dest: Path, manifest: Dict[str, Dict]):
+    tmp_path = dest / (MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(dest / MANIFEST_NAME)
+
+
+def place_file(source: Path, target: Path, link: bool):
+    """Atomically put source at target, by hardlink when link (and possible), else by copy"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.sync-tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    try:
+        if not link:
+            raise OSError("copy requested")
+        os.link(source, tmp_path)
+    except OSError:
+        # Cross-device or unsupported filesystem: fall back to a copy that keeps mtime
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def sync_media(source: Path, dest: Path, link: bool = False, use_hash: bool = False,
+               delete: bool = False, dry_run: bool = False, workers: int = 8) -> Dict[str, int]:
+    """Copy or hardlink changed files from source into dest; return counts per action"""
+    source, dest = Path(source), Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+
+    manifest = load_manifest(dest)
+    source_files = scan_tree(source)
+    dest_files = scan_tree(dest)
+
+    def dest_digest(rel: str) -> str:
+        stat = dest_files[rel]
+        entry = manifest.get(rel)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns and entry.get('sha256'):
+            return entry['sha256']
+        return file_digest(dest / rel)
+
+    def classify(rel: str) -> Optional[str]:
+        """None if rel must be copied; otherwise its SHA-256, or '' when stat alone proved it unchanged"""
+        src_stat = source_files[rel]
+        dst_stat = dest_files.get(rel)
+        if dst_stat is None or dst_stat.st_size != src_stat.st_size:
+            return None
+        if dst_stat.st_mtime_ns == src_stat.st_mtime_ns or (dst_stat.st_ino == src_stat.st_ino
+                                                              and dst_stat.st_dev == src_stat.st_dev):
+            return ''
+        if not use_hash:
+            return None
+        src_hash = file_digest(source / rel)
+        return src_hash if src_hash == dest_digest(rel) else None
+
+    stats = {'copied': 0, 'unchanged': 0, 'deleted': 0}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        verdicts = dict(zip(source_files, pool.map(classify, source_files)))
+        changed = [rel for rel, verdict in verdicts.items() if verdict is None]
+
+        for rel, verdict in verdicts.items():
+            if verdict is None:
+                continue
+            stats['unchanged'] += 1
+            if rel not in manifest:
+                continue  # Already matching but never written by a sync (e.g. copied by hand): not ours to delete
+            stat = dest_files[rel]
+            previous = manifest[rel]
+            sha256 = verdict or None
+            if not sha256 and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+                sha256 = previous.get('sha256')
+            manifest[rel] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+
+        if not dry_run:
+            list(pool.map(lambda rel: place_file(source / rel, dest / rel, link), changed))
+        for rel in changed:
+            print(f"⬆️  {rel}")
+            stats['copied'] += 1
+            if not dry_run:
+                stat = (dest / rel).stat()
+                manifest[rel] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None}
+
+    # Orphans: only files an earlier sync put there, never hand-placed assets
+    orphans = [rel for rel in manifest if rel not in source_files]
+    if delete:
+        for rel in orphans:
+            print(f"🗑️  {rel}")
+            stats['deleted'] += 1
+            if not dry_run:
+                (dest / rel).unlink(missing_ok=True)
+                del manifest[rel]
+    elif orphans:
+        print(f"ℹ️  {len(orphans)} orphaned files kept (use --delete to remove)")
+
+    if not dry_run:
+        save_manifest(dest, manifest)
+    return stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sync scraped media into public/ copying only changed files')
+    parser.add_argument('source', help='Scraper output directory (e.g. renin_images)')
+    parser.add_argument('dest', help='Live directory under public/ (e.g. public/images/renin)')
+    parser.add_argument('--hash', action='store_true',
+                        help='Compare by SHA-256 when sizes match but mtimes differ')
+    parser.add_argument('--link', action='store_true',
+                        help='Hardlink instead of copying (falls back to copy across devices). Only for sources '
+                             'written by rename, like the scrapers\' output: an in-place edit of the source '
+                             'would change the published file too')
+    parser.add_argument('--delete', action='store_true',
+                        help='Delete previously synced files that are gone from the source')
+    parser.add_argument('--dry-run', '-n', action='store_true',
+                        help='Report what would change without touching dest')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='Parallel hash/copy threads (default: 8)')
+    args = parser.parse_args()
+
+    print(f"🔄 Syncing {args.source} → {args.dest}")
+    stats = sync_media(Path(args.source), Path(args.dest), link=args.link, use_hash=args.hash,
+                       delete=args.delete, dry_run=args.dry_run, workers=args.workers)
+    print(f"\n✨ {stats['copied']} copied, {stats['unchanged']} unchanged, {stats['deleted']} deleted"
+          + (" (dry run)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
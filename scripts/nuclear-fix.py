@@ -2,65 +2,253 @@
 """
 Nuclear option: Fix all syntax errors aggressively
 """
+import hashlib
 import re
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Tuple
+
+from fix_cache import FixCache
+from ts_walk import walk_ts_files
 
 BASE_DIR = Path("/Users/spencercarroll/pgclosets-store-main")
 
-def find_all_ts_files() -> List[Path]:
-    """Find all TS/TSX files"""
-    files = []
-    for pattern in ["**/*.ts", "**/*.tsx"]:
-        files.extend(BASE_DIR.glob(pattern))
-    return [f for f in files if "node_modules" not in str(f) and ".next" not in str(f)]
+def find_all_ts_files() -> Iterator[Path]:
+    """Find all TS/TSX files, lazily, skipping node_modules, .next and .gitignore'd paths"""
+    return walk_ts_files(BASE_DIR)
+
+# Tokens in code; every alternative is linear and they never overlap, so
+# scanning a file is linear in its length whatever it contains
+CODE_TOKEN_RE = re.compile(r"""
+    (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<string>'(?:[^'\\\n]|\\[\s\S])*'?|"(?:[^"\\\n]|\\[\s\S])*"?)
+  | (?P<other>[^'"`/{}()\[\];\n]+|/)
+  | (?P<punct>[`{}()\[\];\n])
+""", re.VERBOSE)
+REGEX_LITERAL_RE = re.compile(r'/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\]?)*/?[A-Za-z]*')
+TEMPLATE_CHUNK_RE = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+COMMENTED_CALL_RE = re.compile(r'//\s*console\.log\(')
+# A dangling argument list never contains a new statement
+STATEMENT_START_RE = re.compile(
+    r'[ \t]*(?:const|let|var|return|if|for|while|switch|function|export|import|class|throw|try)\b')
+LINE_TAIL_RE = re.compile(r'[ \t]*(?:\n|\Z)')
+
+IDENTIFIER_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$'
+# After these keywords a '/' starts a regex literal, not a division
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                  'void', 'throw', 'yield', 'await', 'instanceof'}
+OPENERS = {')': '(', ']': '[', '}': '{'}
+
+def comment_call_brackets(code: str) -> Tuple[List[str], bool]:
+    """Brackets still open at the end of a commented-out call's line, and
+    whether it ends inside a template literal
+
+    code is the comment text after 'console.log('. No brackets when the call
+    closes on its own line, or when the text isn't valid code to continue.
+    """
+    stack = ['(']
+    pos = 0
+    while pos < len(code):
+        if code[pos] == '`':
+            pos = TEMPLATE_CHUNK_RE.match(code, pos + 1).end()
+            # Step over same-line ${...} (no nested braces)
+            while code.startswith('${', pos) and code.find('}', pos) >= 0:
+                pos = TEMPLATE_CHUNK_RE.match(code, code.find('}', pos) + 1).end()
+            if pos == len(code):
+                return stack, True
+            if code[pos] != '`':
+                return [], False
+            pos += 1
+            continue
+
+        match = CODE_TOKEN_RE.match(code, pos)
+        token = match.group()
+        pos = match.end()
+        if match.lastgroup == 'string' and (len(token) < 2 or token[-1] != token[0]):
+            return [], False  # Unterminated string
+        if match.lastgroup != 'punct':
+            continue
+        if token in '([{':
+            stack.append(token)
+        elif token in ')]}':
+            if stack[-1] != OPENERS[token]:
+                return [], False
+            stack.pop()
+            if not stack:
+                return [], False
+        else:
+            return [], False  # ';' is never part of an argument list
+    return stack, False
 
 def fix_commented_console_logs(content: str) -> str:
-    """Remove all commented console.log and their dangling objects"""
-
-    # Pattern 1: // console.log(...) with object literal
-    # Remove from // console.log to the closing );
-    pattern1 = r'// console\.log\([^;]*?(\{[^}]*?\})\s*\)'
-    content = re.sub(pattern1, '', content, flags=re.DOTALL)
-
-    # Pattern 2: Dangling object literals after comments
-    # Find lines that are just object properties
-    lines = content.split('\n')
-    fixed_lines = []
-    skip_next = False
-    in_dangling_object = False
-
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-
-        # Check if this is a commented console.log
-        if '// console.log' in line:
-            # Skip this and check if next lines are dangling
-            in_dangling_object = True
+    """Remove all commented console.log and their dangling objects
+
+    One pass of a small tokenizer that tracks strings, comments, regex and
+    template literals, and bracket depth. A '// console.log(' whose brackets
+    don't close on its line continues into the live lines after it (what's
+    left when console.log(...) is commented out one line at a time); those
+    lines go too, up to the closing bracket, unless they stop looking like
+    arguments, in which case only the comment is removed.
+    """
+    out = []           # Slices of content to keep
+    keep_from = 0      # Start of text not yet copied to out
+    pos = 0
+    end = len(content)
+    in_template = False
+    templates = []     # Open braces inside each enclosing ${...}
+    regex_ok = True    # Whether a '/' here starts a regex literal
+    call = None        # Open brackets of a dangling commented-out call
+    call_start = call_comment_end = 0
+    call_whole_line = False
+
+    def abort_call():
+        # Not a dangling call after all: remove just its comment
+        nonlocal keep_from, call
+        out.append(content[keep_from:call_start])
+        keep_from = call_comment_end
+        call = None
+
+    while pos < end:
+        if in_template:
+            pos = TEMPLATE_CHUNK_RE.match(content, pos).end()
+            if content.startswith('`', pos):
+                pos += 1
+                in_template = False
+                regex_ok = False
+            elif pos < end:
+                pos += 2  # ${
+                templates.append(0)
+                in_template = False
+                regex_ok = True
             continue
 
-        # Check if we're in a dangling object
-        if in_dangling_object:
-            # Is this an object property line?
-            if re.match(r'^\s*\w+:\s*', stripped) or stripped in ['{', '}', '});', '},', '}):']:
-                # Skip it
+        if content[pos] == '/' and regex_ok and content[pos + 1:pos + 2] not in ('/', '*'):
+            pos = REGEX_LITERAL_RE.match(content, pos).end()
+            regex_ok = False
+            continue
+
+        match = CODE_TOKEN_RE.match(content, pos)
+        kind, token = match.lastgroup, match.group()
+        pos = match.end()
+
+        if kind == 'line_comment':
+            commented = COMMENTED_CALL_RE.match(token)
+            if not commented:
                 continue
+            if call is not None:
+                abort_call()
+
+            line_start = content.rfind('\n', 0, match.start()) + 1
+            before = content[line_start:match.start()]
+            start = line_start + len(before.rstrip())
+            whole_line = not before.strip()
+            comment_end = pos + 1 if whole_line and pos < end else pos
+
+            # A template literal left open carries the scan on inside it
+            stack, in_template = comment_call_brackets(token[commented.end():])
+            if stack:
+                call = stack
+                call_start, call_comment_end, call_whole_line = start, comment_end, whole_line
             else:
-                # End of dangling object
-                in_dangling_object = False
-                fixed_lines.append(line)
-        else:
-            fixed_lines.append(line)
+                out.append(content[keep_from:start])
+                keep_from = comment_end
+
+        elif kind == 'string':
+            regex_ok = False
+
+        elif kind == 'other':
+            stripped = token.rstrip()
+            if stripped:
+                word = stripped[len(stripped.rstrip(IDENTIFIER_CHARS)):]
+                regex_ok = word in REGEX_KEYWORDS if word else stripped[-1] not in ')]'
+
+        elif kind == 'punct':
+            if token == '`':
+                in_template = True
+            elif token == '\n':
+                if call is not None and STATEMENT_START_RE.match(content, pos):
+                    abort_call()
+            elif token == ';':
+                regex_ok = True
+                if call is not None:
+                    abort_call()
+            elif token in '([{':
+                regex_ok = True
+                if token == '{' and templates:
+                    templates[-1] += 1
+                if call is not None:
+                    call.append(token)
+            else:
+                if token == '}' and templates:
+                    if templates[-1] == 0:
+                        # Closes a ${...}: back into the template literal
+                        templates.pop()
+                        in_template = True
+                        continue
+                    templates[-1] -= 1
+                regex_ok = token == '}'
+                if call is None:
+                    continue
+                if call[-1] != OPENERS[token]:
+                    abort_call()
+                    continue
+                call.pop()
+                if not call:
+                    # Call closed: drop it with its ';' and, if it owned the line, the newline
+                    if content.startswith(';', pos):
+                        pos += 1
+                    tail = LINE_TAIL_RE.match(content, pos)
+                    if tail and call_whole_line:
+                        pos = tail.end()
+                    out.append(content[keep_from:call_start])
+                    keep_from = pos
+                    call = None
+                    regex_ok = True
+
+    if call is not None:
+        abort_call()
+    out.append(content[keep_from:])
+    return ''.join(out)
+
+def check_pathological(size: int = 1 << 20, budget: float = 5.0) -> bool:
+    """Time fix_commented_console_logs on adversarial inputs; True if all stay linear
 
-    return '\n'.join(fixed_lines)
+    Each input is run at size and 4x size: the time must grow at most ~linearly
+    (under 8x, allowing for noise) and the larger run must finish within budget seconds.
+    """
+    import time
+
+    inputs = {
+        'unclosed braces, no ;': lambda n: '// console.log(' + '{ ' * (n // 2),
+        'many dangling calls': lambda n: '// console.log("a", {\n  b: 1,\n' * (n // 30),
+        'unterminated strings': lambda n: '"\'`' * (n // 3),
+        'slashes': lambda n: '/' * n,
+        'nested templates': lambda n: '`${' * (n // 3),
+        'commented template': lambda n: '// console.log(`' + '${x}' * (n // 4),
+        'block comment openers': lambda n: '/*' * (n // 2),
+        'long identifier': lambda n: 'x' * n,
+        'brackets': lambda n: '([{' * (n // 3),
+    }
+    ok = True
+    for name, make in inputs.items():
+        timings = []
+        for n in (size // 4, size):
+            content = make(n)
+            start = time.perf_counter()
+            fix_commented_console_logs(content)
+            timings.append(time.perf_counter() - start)
+        linear = timings[1] < budget and timings[1] < 8 * max(timings[0], 1e-3)
+        ok = ok and linear
+        print(f"{'✅' if linear else '❌'} {name}: {timings[0] * 1000:.0f} ms → {timings[1] * 1000:.0f} ms")
+    return ok
 
 def fix_unused_imports(content: str) -> str:
     """Remove unused imports"""
     # This is complex - skip for now
     return content
 
-def fix_file(filepath: Path) -> bool:
-    """Fix a single file"""
+def fix_file(filepath: Path) -> Optional[bool]:
+    """Fix a single file; None if it could not be processed"""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             original = f.read()
@@ -74,21 +262,51 @@ def fix_file(filepath: Path) -> bool:
         return False
     except Exception as e:
         print(f"Error fixing {filepath}: {e}")
-        return False
+        return None
 
 def main():
+    global BASE_DIR
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Remove broken commented-out console.log statements')
+    parser.add_argument('--base-dir', type=Path, default=BASE_DIR,
+                        help=f'Project root to fix (default: {BASE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Process every file, ignoring and not updating the clean-file cache')
+    parser.add_argument('--check-pathological', action='store_true',
+                        help='Check the console.log scanner stays linear on adversarial input')
+    args = parser.parse_args()
+    BASE_DIR = args.base_dir
+
+    if args.check_pathological:
+        raise SystemExit(0 if check_pathological() else 1)
+
     print("🚀 Nuclear fix: Removing all broken console.log statements...")
 
-    files = find_all_ts_files()
-    print(f"📁 Processing {len(files)} files...")
+    cache = None
+    if not args.no_cache:
+        # The rules are code, so any edit to this script invalidates the cache
+        rules_hash = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+        cache = FixCache(BASE_DIR, "nuclear-fix", rules_hash)
 
-    fixed = 0
-    for filepath in files:
-        if fix_file(filepath):
+    found = processed = fixed = 0
+    for filepath in find_all_ts_files():
+        found += 1
+        if cache and cache.is_clean(filepath):
+            continue
+        processed += 1
+        result = fix_file(filepath)
+        if result:
             fixed += 1
             print(f"✅ Fixed: {filepath.relative_to(BASE_DIR)}")
+        elif result is False and cache:
+            cache.mark_clean(filepath)
+
+    if cache:
+        cache.save()
 
-    print(f"\n✨ Fixed {fixed} files")
+    print(f"\n📁 Processed {processed} of {found} files")
+    print(f"✨ Fixed {fixed} files")
 
 if __name__ == "__main__":
     main()
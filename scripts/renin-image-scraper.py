@@ -6,6 +6,8 @@ Extracts product images from Renin's barn door catalog for e-commerce use.
 
 import os
 import re
+import shutil
+import hashlib
 import requests
 import time
 import json
@@ -15,11 +17,19 @@ from pathlib import Path
 import concurrent.futures
 from threading import Lock
 
+from disk_cache import DiskCache, format_size, parse_size
+from image_index import INDEX_PATH, ImageIndex, requested_size, variant_key
+from renin_extract import extract_product_page
+
+PRODUCTS_DB = Path(__file__).resolve().parent.parent / "data" / "renin-products-database.json"
+
 class ReninImageScraper:
-    def __init__(self, output_dir="renin_images", max_workers=5, delay=1.0):
+    def __init__(self, output_dir="renin_images", max_workers=5, delay=1.0, parse_workers=None,
+                 image_index=None, quality_gate=None, cache_budget=None):
         self.base_url = "https://www.renin.com"
         self.output_dir = Path(output_dir)
         self.max_workers = max_workers
+        self.parse_workers = parse_workers  # None = one parser process per core
         self.delay = delay  # Respectful delay between requests
         self.session = requests.Session()
         self.session.headers.update({
@@ -27,6 +37,18 @@ class ReninImageScraper:
         })
         self.download_lock = Lock()
         self.downloaded_count = 0
+        self.reused_count = 0
+        self.coalesced_count = 0
+        # variant_key() of an image -> Future of the file its single transfer wrote (None if it failed);
+        # concurrent and later requests for the same image wait on it instead of fetching again
+        self.in_flight = {}
+        self.assigned_names = {}  # Filename -> variant_key() of the image it was given to
+        # Images any Renin scraper already saved, by canonical URL
+        self.image_index = image_index if image_index is not None else ImageIndex()
+        # 'tag' or 'quarantine' blank, blurred and near-solid downloads (scripts/image_quality.py)
+        self.quality_gate = quality_gate
+        # Disk budget in bytes: least recently used size variants are evicted, originals pinned
+        self.disk_cache = DiskCache(self.output_dir, cache_budget) if cache_budget else None
         
         # Create output directories
         self.output_dir.mkdir(exist_ok=True)
@@ -64,65 +86,74 @@ class ReninImageScraper:
             print(f"❌ Error getting product URLs: {e}")
             return []
     
-    def extract_product_data(self, product_url):
-        """Extract product data and images from a product page."""
+    def fetch_product_page(self, product_url):
+        """Fetch a product page and return its raw bytes (network only, no parsing)."""
         try:
             time.sleep(self.delay)  # Respectful delay
-            
+
             response = self.session.get(product_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract product name and code
-            title = soup.find('h1', class_='product_title')
-            product_name = title.get_text(strip=True) if title else "Unknown Product"
-            
-            # Clean product name for filename
-            clean_name = re.sub(r'[^\w\s-]', '', product_name)
-            clean_name = re.sub(r'[-\s]+', '-', clean_name).strip('-')
-            
-            # Extract product images
-            images = []
-            
-            # Look for main product images
-            img_tags = soup.find_all('img', src=re.compile(r'wp-content/uploads.*\.(jpg|jpeg|png|webp)', re.I))
-            
-            for img in img_tags:
-                src = img.get('src')
-                if src and 'wp-content/uploads' in src:
-                    # Get full resolution image URL
-                    img_url = urljoin(self.base_url, src)
-                    
-                    # Remove size suffixes to get original image
-                    img_url = re.sub(r'-\d+x\d+(\.(jpg|jpeg|png|webp))$', r'\1', img_url, flags=re.I)
-                    
-                    images.append({
-                        'url': img_url,
-                        'alt': img.get('alt', ''),
-                        'filename': self.get_image_filename(img_url, clean_name)
-                    })
-            
-            # Remove duplicates
-            unique_images = []
-            seen_urls = set()
-            for img in images:
-                if img['url'] not in seen_urls:
-                    unique_images.append(img)
-                    seen_urls.add(img['url'])
-            
-            return {
-                'name': product_name,
-                'clean_name': clean_name,
-                'url': product_url,
-                'images': unique_images
-            }
-            
+            return response.content
+
+        except Exception as e:
+            print(f"❌ Error fetching {product_url}: {e}")
+            return None
+
+    def build_product_data(self, product_data):
+        """Attach local filenames to images parsed by extract_product_page."""
+        for img in product_data['images']:
+            img['filename'] = self.get_image_filename(img['url'], product_data['clean_name'])
+        return product_data
+
+    def extract_product_data(self, product_url):
+        """Extract product data and images from a product page."""
+        html = self.fetch_product_page(product_url)
+        if html is None:
+            return None
+
+        try:
+            return self.build_product_data(extract_product_page(html, product_url, self.base_url))
         except Exception as e:
             print(f"❌ Error extracting data from {product_url}: {e}")
             return None
-    
+
+    def extract_all_product_data(self, product_urls):
+        """Fetch pages on network threads and parse them in a process pool.
+
+        Fetch threads hand raw bytes to the parse pool and go straight back
+        to the network, so page parsing runs on the other cores. Results
+        keep the order of product_urls.
+        """
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as fetch_pool:
+
+            def fetch_and_submit(url):
+                html = self.fetch_product_page(url)
+                if html is None:
+                    return None
+                return parse_pool.submit(extract_product_page, html, url, self.base_url)
+
+            parse_futures = list(fetch_pool.map(fetch_and_submit, product_urls))
+
+            products_data = []
+            for i, (url, future) in enumerate(zip(product_urls, parse_futures), 1):
+                print(f"Processing {i}/{len(product_urls)}: {url}")
+                if future is None:
+                    continue
+                try:
+                    products_data.append(self.build_product_data(future.result()))
+                except Exception as e:
+                    print(f"❌ Error extracting data from {url}: {e}")
+
+        return products_data
+
     def get_image_filename(self, img_url, product_name):
-        """Generate a clean filename for the image."""
+        """Generate a clean filename for the image.
+
+        <product>_<kind>_<hash><ext>, the hash taken from the canonical URL
+        (and size variant) so a product's images never share a name and the same image gets the
+        same name on every run. Lengthened if two images ever do collide.
+        """
         parsed = urlparse(img_url)
         original_filename = os.path.basename(parsed.path)
         
@@ -138,8 +169,14 @@ class ReninImageScraper:
             suffix = 'detail'
         else:
             suffix = 'image'
-        
-        return f"{product_name}_{suffix}{ext}"
+
+        key = variant_key(img_url)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        for length in (8, 16, 32):
+            filename = f"{product_name}_{suffix}_{digest[:length]}{ext}"
+            if self.assigned_names.setdefault(filename, key) == key:
+                return filename
+        raise ValueError(f"No unique filename for {img_url}")
     
     def download_image(self, image_data, category="barn_doors"):
         """Download a single image."""
@@ -150,41 +187,190 @@ class ReninImageScraper:
             # Determine output path
             output_path = self.output_dir / category / filename
             
-            # Skip if already exists
-            if output_path.exists():
-                return True
-            
-            # Download image
-            response = self.session.get(img_url, stream=True)
-            response.raise_for_status()
-            
-            # Save image
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
+            # Single flight: the first request for an image transfers it, the rest wait for that
+            key = variant_key(img_url)
             with self.download_lock:
-                self.downloaded_count += 1
-                print(f"✅ Downloaded: {filename} ({self.downloaded_count})")
-            
+                transfer = self.in_flight.get(key)
+                owner = transfer is None
+                if owner:
+                    transfer = self.in_flight[key] = concurrent.futures.Future()
+
+            if not owner:
+                source = transfer.result()
+                if source is None:
+                    return False
+                if source != output_path and not output_path.exists():
+                    part_path = output_path.with_name(output_path.name + '.part')
+                    shutil.copyfile(source, part_path)
+                    part_path.replace(output_path)
+                self.track(img_url, output_path)
+                with self.download_lock:
+                    self.coalesced_count += 1
+                return True
+
+            try:
+                transfer.set_result(self.fetch_image(img_url, output_path))
+            except BaseException:
+                transfer.set_result(None)
+                raise
+            self.track(img_url, output_path)
             return True
             
         except Exception as e:
             print(f"❌ Error downloading {image_data.get('url', 'unknown')}: {e}")
             return False
+
+    def track(self, img_url, path):
+        """Note a use of path in the disk cache; original uploads are pinned."""
+        if self.disk_cache:
+            self.disk_cache.record(path, pinned=requested_size(img_url) is None)
+
+    def enforce_cache_budget(self, products_data):
+        """Evict least recently used images past the budget; evicted ones are dropped from products_data."""
+        evicted = self.disk_cache.enforce()
+        self.disk_cache.save()
+        # A budget smaller than this run's variants evicts some of them too
+        gone = {key.rpartition('/')[2] for key, _ in evicted if key.startswith('barn_doors/')}
+        if gone:
+            for product_data in products_data:
+                product_data['images'] = [img for img in product_data['images'] if img['filename'] not in gone]
+        files, total, pinned = self.disk_cache.usage()
+        print(f"🗄️  Disk cache: {files} files, {format_size(total)} ({format_size(pinned)} pinned originals) "
+              f"of {format_size(self.disk_cache.budget)}"
+              + (f"; evicted {len(evicted)} files, {format_size(sum(size for _, size in evicted))}"
+                 if evicted else ""))
+        if pinned > self.disk_cache.budget:
+            print("⚠️  Pinned originals alone exceed the budget")
+
+    def fetch_image(self, img_url, output_path):
+        """Get one image into output_path (existing file, shared index or network); return the path"""
+        filename = output_path.name
+
+        # Skip if already exists (and let other scrapers find it)
+        if output_path.exists():
+            self.image_index.record(img_url, output_path)
+            return output_path
+
+        # Copy instead of fetching if another run or scraper already has it
+        if self.image_index.copy_to(img_url, output_path):
+            with self.download_lock:
+                self.reused_count += 1
+            print(f"♻️  Reused: {filename}")
+            return output_path
+
+        # Download image
+        response = self.session.get(img_url, stream=True)
+        response.raise_for_status()
+
+        # Save image; written under .part so an interrupted transfer never looks finished
+        part_path = output_path.with_name(filename + '.part')
+        try:
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+            part_path.replace(output_path)
+        finally:
+            part_path.unlink(missing_ok=True)
+        self.image_index.record(img_url, output_path)
+
+        with self.download_lock:
+            self.downloaded_count += 1
+            print(f"✅ Downloaded: {filename} ({self.downloaded_count})")
+        return output_path
     
+    def gate_quality(self, products_data, downloaded):
+        """Score downloaded images in one batch; quarantined ones are dropped from products_data."""
+        from image_quality import QUARANTINE_DIR, REPORT_FILE, gate_images
+
+        quarantine = self.quality_gate == 'quarantine'
+        paths = {id(img): str(self.output_dir / "barn_doors" / img['filename']) for img in downloaded}
+        failed = gate_images(paths.values(), self.output_dir, quarantine=quarantine)
+        for score in failed:
+            print(f"{'🚫' if quarantine else '⚠️ '} {Path(score.path).name}: {', '.join(score.failures)}")
+        if quarantine:
+            rejected = {score.path for score in failed}
+            for product_data in products_data:
+                product_data['images'] = [img for img in product_data['images']
+                                          if paths.get(id(img)) not in rejected]
+        moved = f", moved to {self.output_dir / QUARANTINE_DIR}" if quarantine and failed else ""
+        print(f"🔎 Quality gate: {len(failed)} of {len(set(paths.values()))} images failed{moved} "
+              f"(scores in {self.output_dir / REPORT_FILE})")
+
     def save_metadata(self, products_data):
         """Save product metadata to JSON file."""
         metadata_file = self.output_dir / "metadata" / "products.json"
         
         try:
-            with open(metadata_file, 'w') as f:
+            tmp_path = metadata_file.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
                 json.dump(products_data, f, indent=2)
+            tmp_path.replace(metadata_file)
             print(f"💾 Saved metadata to {metadata_file}")
         except Exception as e:
             print(f"❌ Error saving metadata: {e}")
     
-    def scrape_all(self):
+    def update_products_database(self, products_data, db_path=PRODUCTS_DB):
+        """Merge scraped catalogue data into the products database, keyed by slug.
+
+        Curated fields of existing products are left alone; scraped data goes
+        under their "renin" key. Products not in the database are added.
+        """
+        db_path = Path(db_path)
+        if db_path.exists():
+            with open(db_path, encoding='utf-8') as f:
+                database = json.load(f)
+        else:
+            database = {"products": [], "categories": []}
+
+        by_slug = {product['slug']: product for product in database['products']}
+        added = updated = 0
+
+        for product_data in products_data:
+            catalogue = product_data.get('catalogue')
+            if not catalogue or not (catalogue['sku'] or catalogue['prices'] or catalogue['variants']):
+                continue
+
+            slug = product_data['slug']
+            entry = by_slug.get(slug)
+            if entry is None:
+                prices = catalogue['prices']
+                entry = {
+                    "id": f"renin-{slug}",
+                    "name": catalogue['name'] or product_data['name'],
+                    "slug": slug,
+                    "price": round(prices[0]) if prices else None,
+                    "category": "barn",
+                    "images": [f"/{self.output_dir.name}/barn_doors/{img['filename']}"
+                               for img in product_data['images']],
+                    "description": catalogue['description'] or "",
+                    "inStock": catalogue['inStock'] is not False,
+                }
+                database['products'].append(entry)
+                by_slug[slug] = entry
+                added += 1
+            else:
+                updated += 1
+
+            if catalogue['sku']:
+                entry.setdefault("sku", catalogue['sku'])
+            entry["renin"] = {
+                "url": product_data['url'],
+                "sku": catalogue['sku'],
+                "currency": catalogue['currency'],
+                "prices": catalogue['prices'],
+                "sizes": catalogue['sizes'],
+                "gallery": catalogue['gallery'],
+                "variants": catalogue['variants'],
+            }
+
+        tmp_path = db_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2)
+            f.write('\n')
+        tmp_path.replace(db_path)
+        print(f"🗂️  Products database: {added} added, {updated} updated ({db_path})")
+
+    def scrape_all(self, products_db=PRODUCTS_DB):
         """Main scraping function."""
         print("🚀 Starting Renin image scraper...")
         
@@ -196,16 +382,10 @@ class ReninImageScraper:
         
         # Extract product data
         print("\n📊 Extracting product data...")
-        products_data = []
+        products_data = self.extract_all_product_data(product_urls)
         all_images = []
-        
-        for i, url in enumerate(product_urls, 1):
-            print(f"Processing {i}/{len(product_urls)}: {url}")
-            product_data = self.extract_product_data(url)
-            
-            if product_data:
-                products_data.append(product_data)
-                all_images.extend(product_data['images'])
+        for product_data in products_data:
+            all_images.extend(product_data['images'])
         
         print(f"\n📷 Found {len(all_images)} images to download")
         
@@ -214,11 +394,21 @@ class ReninImageScraper:
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = [executor.submit(self.download_image, img) for img in all_images]
             concurrent.futures.wait(futures)
+        self.image_index.save()
+
+        if self.quality_gate:
+            print("\n🔎 Scoring image quality...")
+            self.gate_quality(products_data, [img for img, future in zip(all_images, futures) if future.result()])
+        if self.disk_cache:
+            self.enforce_cache_budget(products_data)
         
         # Save metadata
         self.save_metadata(products_data)
+        if products_db:
+            self.update_products_database(products_data, products_db)
         
-        print(f"\n🎉 Scraping complete! Downloaded {self.downloaded_count} images")
+        print(f"\n🎉 Scraping complete! Downloaded {self.downloaded_count} images, reused {self.reused_count}, "
+              f"coalesced {self.coalesced_count} duplicate requests")
         print(f"📁 Images saved to: {self.output_dir}")
 
 def main():
@@ -232,6 +422,20 @@ def main():
                        help='Number of download threads (default: 5)')
     parser.add_argument('--delay', '-d', type=float, default=1.0,
                        help='Delay between requests in seconds (default: 1.0)')
+    parser.add_argument('--parse-workers', '-p', type=int, default=None,
+                       help='HTML parsing processes (default: one per CPU core)')
+    parser.add_argument('--products-db', default=str(PRODUCTS_DB),
+                       help='Products database to merge catalogue data into (default: data/renin-products-database.json)')
+    parser.add_argument('--skip-catalogue', action='store_true',
+                       help='Do not update the products database')
+    parser.add_argument('--no-image-index', action='store_true',
+                       help=f'Do not reuse or record images in the shared index ({INDEX_PATH.name})')
+    parser.add_argument('--quality-gate', choices=['tag', 'quarantine'],
+                       help='Score downloads for blank, blurred and near-solid images and list (tag) '
+                            'or move (quarantine) failures')
+    parser.add_argument('--cache-budget', type=parse_size, metavar='SIZE',
+                       help='Keep the output directory under SIZE (e.g. 2G) by evicting the least '
+                            'recently used size variants; originals are never evicted')
     
     args = parser.parse_args()
     
@@ -239,10 +443,14 @@ def main():
     scraper = ReninImageScraper(
         output_dir=args.output,
         max_workers=args.workers,
-        delay=args.delay
+        delay=args.delay,
+        parse_workers=args.parse_workers,
+        image_index=ImageIndex(None if args.no_image_index else INDEX_PATH),
+        quality_gate=args.quality_gate,
+        cache_budget=args.cache_budget
     )
     
-    scraper.scrape_all()
+    scraper.scrape_all(products_db=None if args.skip_catalogue else args.products_db)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,23 +2,57 @@
 """
 Renin.com Scraper - Downloads entire site for local hosting
 Bypasses Cloudflare using curl-cffi browser impersonation
+
+--precompress also writes .gz and .br siblings of the mirror's text files
+for servers that send precompressed files as-is (nginx gzip_static and
+brotli_static, Caddy precompressed), so nothing is compressed per request.
+
+--cache-budget keeps the mirror under a disk budget (scripts/disk_cache.py):
+the pages of the latest crawl and every file they reference are pinned, so
+the mirror never loses an asset a page still uses. Files earlier crawls left
+behind and .gz/.br siblings (the server falls back to the plain file, and
+--precompress writes them again) are evicted least recently used first.
 """
 
 import re
 import os
+import sys
+import gzip
 import time
+import json
 import hashlib
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
 from curl_cffi import requests
 from bs4 import BeautifulSoup
 import logging
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from disk_cache import INDEX_NAME as CACHE_INDEX_FILE, DiskCache, format_size, parse_size
+from image_index import INDEX_PATH, ImageIndex, is_image_url
+from url_fingerprints import URLFingerprintSet, url_fingerprint
+
 # Configuration
 BASE_URL = "https://www.renin.com"
 START_PATH = "/us/"
 OUTPUT_DIR = "/Users/spencercarroll/pgclosets-store/public/renin"
+SITE_ROOT = "/renin"  # URL path OUTPUT_DIR is served under (public/renin)
+URL_INDEX_FILE = "url-index.json"
+PRECOMPRESS_MANIFEST = "precompress-manifest.json"
+PRECOMPRESS_SUFFIXES = ('.html', '.css', '.js', '.mjs', '.svg', '.json', '.xml', '.txt', '.map')
+PRECOMPRESS_MIN_SIZE = 256  # Smaller files gain nothing over the extra lookup
 DELAY = 1  # Seconds between requests to be respectful
+MAX_RPS = 4  # Requests per second across all workers in sharded mode
+EXPECTED_URLS = 100_000  # Presizes the seen-sets; they grow past this as needed
 
 # Setup logging
 logging.basicConfig(
@@ -29,11 +63,17 @@ logger = logging.getLogger(__name__)
 
 
 class ReninScraper:
-    def __init__(self):
+    def __init__(self, image_index_path=INDEX_PATH):
         self.session = requests.Session(impersonate="chrome120")
-        self.visited_urls = set()
-        self.asset_urls = set()
-        self.to_visit = [urljoin(BASE_URL, START_PATH)]
+        # 64-bit fingerprints instead of URL strings: ~16-32 bytes per URL
+        self.visited_urls = URLFingerprintSet(expected_items=EXPECTED_URLS, bloom_bits_per_item=10)
+        self.asset_urls = URLFingerprintSet(expected_items=EXPECTED_URLS)
+        self.to_visit = deque([urljoin(BASE_URL, START_PATH)])
+        self.pending_assets = None  # Set by shard workers to hand assets to the coordinator
+        self.url_index = {}  # Normalized URL -> path relative to output_dir
+        self.image_index = ImageIndex(image_index_path)  # Images any Renin scraper already saved
+        self.rate_limiter = None
+        self.shard_worker = False  # Workers only read the image index; the coordinator records and saves it
         self.output_dir = Path(OUTPUT_DIR)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -73,6 +113,22 @@ class ReninScraper:
 
         return self.output_dir / path.lstrip('/')
 
+    def index_path(self, url, local_path):
+        """Record where a URL is mirrored and return the path"""
+        self.url_index[url] = local_path.relative_to(self.output_dir).as_posix()
+        return local_path
+
+    def load_url_index(self):
+        """Load the URL index written by a previous crawl"""
+        with open(self.output_dir / URL_INDEX_FILE, encoding='utf-8') as f:
+            self.url_index = json.load(f)
+        logger.info(f"Loaded URL index: {len(self.url_index)} entries")
+
+    def save_url_index(self):
+        """Persist the URL index so links can be rewritten without re-crawling"""
+        replace_file(self.output_dir / URL_INDEX_FILE, json.dumps(self.url_index, indent=0, sort_keys=True))
+        logger.info(f"Saved URL index: {len(self.url_index)} entries")
+
     def is_valid_url(self, url):
         """Check if URL should be scraped"""
         parsed = urlparse(url)
@@ -87,72 +143,99 @@ class ReninScraper:
         """Make filename safe for filesystem"""
         return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
+    def get_asset_path(self, url):
+        """Local file path an asset URL is saved to"""
+        path = urlparse(url).path
+
+        # Handle wp-content uploads
+        if '/wp-content/uploads/' in path:
+            relative_path = path.split('/wp-content/uploads/')[1]
+            return self.output_dir / 'wp-content' / 'uploads' / relative_path
+
+        # Determine extension
+        if path.endswith('.css'):
+            return self.output_dir / 'assets' / 'css' / os.path.basename(path)
+        if path.endswith('.js'):
+            return self.output_dir / 'assets' / 'js' / os.path.basename(path)
+        if any(ext in path for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico']):
+            return self.output_dir / 'assets' / 'images' / os.path.basename(path)
+        if any(ext in path for ext in ['.woff', '.woff2', '.ttf', '.otf', '.eot']):
+            return self.output_dir / 'assets' / 'fonts' / os.path.basename(path)
+        return self.output_dir / 'assets' / self.sanitize_filename(os.path.basename(path))
+
     def download_asset(self, url):
         """Download an asset file (CSS, JS, image, font)"""
-        if url in self.asset_urls:
+        if not self.asset_urls.add(url):
             return None
 
-        self.asset_urls.add(url)
-
         try:
+            local_path = self.get_asset_path(url)
+            # Same size variant only: a mirrored srcset must keep its pixel sizes
+            if is_image_url(url) and self.image_index.copy_to(url, local_path, exact=True):
+                logger.info(f"Reused asset: {url}")
+                return self.index_path(url, local_path)
+
+            self.throttle()
             response = self.session.get(url, timeout=30)
             if response.status_code != 200:
                 return None
 
-            # Determine file path
-            parsed = urlparse(url)
-            path = parsed.path
-
-            # Handle wp-content uploads
-            if '/wp-content/uploads/' in path:
-                relative_path = path.split('/wp-content/uploads/')[1]
-                local_path = self.output_dir / 'wp-content' / 'uploads' / relative_path
-            else:
-                # Determine extension
-                if path.endswith('.css'):
-                    local_path = self.output_dir / 'assets' / 'css' / os.path.basename(path)
-                elif path.endswith('.js'):
-                    local_path = self.output_dir / 'assets' / 'js' / os.path.basename(path)
-                elif any(ext in path for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico']):
-                    local_path = self.output_dir / 'assets' / 'images' / os.path.basename(path)
-                elif any(ext in path for ext in ['.woff', '.woff2', '.ttf', '.otf', '.eot']):
-                    local_path = self.output_dir / 'assets' / 'fonts' / os.path.basename(path)
-                else:
-                    local_path = self.output_dir / 'assets' / sanitize_filename(os.path.basename(path))
-
             local_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(local_path, 'wb') as f:
-                f.write(response.content)
+            replace_file(local_path, response.content)
+            if is_image_url(url) and not self.shard_worker:
+                self.image_index.record(url, local_path)
 
             logger.info(f"Downloaded asset: {url}")
-            return local_path
+            return self.index_path(url, local_path)
 
         except Exception as e:
             logger.error(f"Failed to download asset {url}: {e}")
             return None
 
-    def process_page(self, url, content):
-        """Process HTML page, download assets, fix links"""
-        soup = BeautifulSoup(content, 'html.parser')
-
+    def request_asset(self, url):
+        """Return the local path for an asset, or None if it could not be downloaded.
+
+        Single-process runs download inline; shard workers queue the URL for
+        the coordinator, which owns the asset map and hands each asset to
+        exactly one worker. Workers cannot wait for that, so they get the
+        path the asset will have; if its download fails, the coordinator
+        points the page back at the remote URL (restore_remote_assets()).
+        """
+        if self.pending_assets is not None:
+            self.pending_assets.append(url)
+            return self.get_asset_path(url)
+        self.download_asset(url)
+        rel_path = self.url_index.get(url)  # Only indexed once it is on disk
+        return self.output_dir / rel_path if rel_path is not None else None
+
+    def asset_link(self, full_url):
+        """What a saved page should reference for an asset: its mirrored path, else the live URL"""
+        local_path = self.request_asset(full_url)
+        if local_path is None:
+            return full_url
+        return local_url(local_path.relative_to(self.output_dir).as_posix())
+
+    def throttle(self):
+        """Wait for a request slot (shard workers share a global rate limit)"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+
+    def process_page(self, url, soup):
+        """Process parsed HTML page, download assets, fix links"""
         # Process links in head (CSS, JS, etc)
         for link in soup.find_all('link', {'rel': re.compile('stylesheet', re.I)}):
             href = link.get('href')
             if href and not href.startswith('data:'):
                 full_url = urljoin(url, href)
                 if self.is_valid_url(full_url):
-                    local_path = self.download_asset(full_url)
-                    if local_path:
-                        link['href'] = f'/assets/css/{local_path.name}'
+                    link['href'] = self.asset_link(full_url)
 
         for script in soup.find_all('script', {'src': True}):
             src = script.get('src')
             full_url = urljoin(url, src)
             if self.is_valid_url(full_url):
-                local_path = self.download_asset(full_url)
-                if local_path:
-                    script['src'] = f'/assets/js/{local_path.name}'
+                script['src'] = self.asset_link(full_url)
 
         # Process images
         for img in soup.find_all('img', {'src': True}):
@@ -160,9 +243,7 @@ class ReninScraper:
             if src and not src.startswith('data:'):
                 full_url = urljoin(url, src)
                 if self.is_valid_url(full_url):
-                    local_path = self.download_asset(full_url)
-                    if local_path:
-                        img['src'] = f'/assets/images/{local_path.name}'
+                    img['src'] = self.asset_link(full_url)
 
         # Process srcset
         for img in soup.find_all('img', {'srcset': True}):
@@ -173,64 +254,74 @@ class ReninScraper:
                     url_part = part.strip().split()[0]
                     full_url = urljoin(url, url_part)
                     if self.is_valid_url(full_url):
-                        local_path = self.download_asset(full_url)
-                        if local_path:
-                            new_srcset.append(f"/assets/images/{local_path.name} {part.strip().split()[1] if len(part.strip().split()) > 1 else ''}")
+                        new_srcset.append(f"{self.asset_link(full_url)} {part.strip().split()[1] if len(part.strip().split()) > 1 else ''}")
             if new_srcset:
                 img['srcset'] = ', '.join(new_srcset)
 
         return str(soup)
 
-    def scrape_page(self, url):
-        """Scrape a single page"""
-        if url in self.visited_urls:
-            return
-
-        self.visited_urls.add(url)
+    def find_links(self, url, soup):
+        """Normalized in-site page URLs linked from a parsed page"""
+        links = []
+        for link in soup.find_all('a', {'href': True}):
+            full_url = urljoin(url, link.get('href'))
+            if self.is_valid_url(full_url):
+                parsed = urlparse(full_url)
+                links.append(f"{parsed.scheme}://{parsed.netloc}{parsed.path}")
+        return links
 
+    def crawl_page(self, url):
+        """Fetch, rewrite and save one page; return its outgoing links or None on failure"""
         try:
             logger.info(f"Scraping: {url}")
+            self.throttle()
             response = self.session.get(url, timeout=30)
 
             if response.status_code != 200:
                 logger.warning(f"Got status {response.status_code} for {url}")
-                return
+                return None
 
             content_type = response.headers.get('content-type', '')
             if 'text/html' not in content_type:
                 # It's an asset, download it
-                self.download_asset(url)
-                return
+                self.request_asset(url)
+                return None
 
-            # Process HTML
-            processed_html = self.process_page(url, response.text)
+            # Parse once: anchors are read before assets are rewritten
+            soup = BeautifulSoup(response.text, 'html.parser')
+            links = self.find_links(url, soup)
+            processed_html = self.process_page(url, soup)
 
-            # Save HTML
-            local_path = self.get_cache_path(url)
+            # Save HTML; <a href> links are rewritten afterwards by rewrite_links()
+            local_path = self.index_path(url, self.get_cache_path(url))
             local_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(local_path, 'w', encoding='utf-8') as f:
-                f.write(processed_html)
+            replace_file(local_path, processed_html)
 
             logger.info(f"Saved: {local_path}")
+            return links
 
-            # Find more links to follow
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for link in soup.find_all('a', {'href': True}):
-                href = link.get('href')
-                full_url = urljoin(url, href)
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {e}")
+            return None
+
+    def scrape_page(self, url):
+        """Scrape a single page"""
+        if url in self.visited_urls:
+            return
 
-                if self.is_valid_url(full_url) and full_url not in self.visited_urls:
-                    # Normalize URL
-                    parsed = urlparse(full_url)
-                    clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                    if clean_url not in [u.split('?')[0].split('#')[0] for u in self.visited_urls]:
-                        self.to_visit.append(clean_url)
+        self.visited_urls.add(url)
 
-            time.sleep(DELAY)
+        links = self.crawl_page(url)
+        if links is None:
+            return
 
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
+        # Find more links to follow
+        for clean_url in links:
+            if clean_url not in self.visited_urls:
+                self.to_visit.append(clean_url)
+
+        time.sleep(DELAY)
 
     def run(self, max_pages=50):
         """Run the scraper"""
@@ -238,7 +329,7 @@ class ReninScraper:
 
         pages_scraped = 0
         while self.to_visit and pages_scraped < max_pages:
-            url = self.to_visit.pop(0)
+            url = self.to_visit.popleft()
             if url not in self.visited_urls:
                 self.scrape_page(url)
                 pages_scraped += 1
@@ -247,10 +338,422 @@ class ReninScraper:
         logger.info(f"Visited {len(self.visited_urls)} URLs")
         logger.info(f"Downloaded {len(self.asset_urls)} assets")
 
+    def run_sharded(self, workers, max_pages=50, max_rps=MAX_RPS):
+        """Run the scraper across worker processes, sharding URLs by hash.
+
+        This process is the coordinator and the single writer of the
+        visited/asset maps: it dedups every discovered page and asset, then
+        routes it to the worker that owns its shard. Workers fetch, parse and
+        write files. Workers finish in any order, but each page's links are
+        queued only once every page dispatched before it has reported back,
+        so pages are admitted in exactly run()'s breadth-first order and
+        max_pages cuts the crawl off at the same pages.
+        """
+        logger.info(f"Starting sharded scrape of {BASE_URL} with {workers} workers")
+
+        limiter = SharedRateLimiter(max_rps)
+        results = mp.Queue()
+        tasks = [mp.Queue() for _ in range(workers)]
+        processes = [
+            mp.Process(target=shard_worker, args=(tasks[i], results, limiter, self.image_index.path), daemon=True)
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        in_flight = 0
+
+        def dispatch(kind, url):
+            nonlocal in_flight
+            tasks[url_fingerprint(url) % workers].put((kind, url))
+            in_flight += 1
+
+        pages_scraped = 0
+        page_numbers = {}  # Page URL in flight -> dispatch order
+        finished = {}  # Dispatch order -> links of a page reported ahead of an earlier one
+        next_page = 0
+        waiting = {}  # Asset URL in flight -> pages referencing it, repaired if its download fails
+        failed_assets = set()
+        try:
+            while True:
+                while self.to_visit and pages_scraped < max_pages:
+                    url = self.to_visit.popleft()
+                    if self.visited_urls.add(url):
+                        page_numbers[url] = pages_scraped
+                        dispatch('page', url)
+                        pages_scraped += 1
+
+                if not in_flight:
+                    break
+
+                kind, url, links, assets, saved_path = results.get()
+                in_flight -= 1
+                if saved_path is not None:
+                    self.url_index[url] = saved_path
+                    # Workers skip image_index.record(); it happens here, where the index is saved
+                    if kind == 'asset' and is_image_url(url):
+                        self.image_index.record(url, self.output_dir / saved_path)
+
+                if kind == 'asset':
+                    pages = waiting.pop(url, ())
+                    if saved_path is None:
+                        failed_assets.add(url)
+                        for page_path in pages:
+                            self.restore_remote_assets(page_path, [url])
+                elif saved_path is not None:
+                    broken = []
+                    for asset_url in dict.fromkeys(assets):
+                        if self.asset_urls.add(asset_url):
+                            waiting[asset_url] = [saved_path]
+                            dispatch('asset', asset_url)
+                        elif asset_url in waiting:
+                            waiting[asset_url].append(saved_path)
+                        elif asset_url in failed_assets:
+                            broken.append(asset_url)
+                    if broken:
+                        self.restore_remote_assets(saved_path, broken)
+                else:
+                    for asset_url in assets:  # A non-HTML URL reached as a page
+                        if self.asset_urls.add(asset_url):
+                            waiting[asset_url] = []
+                            dispatch('asset', asset_url)
+                if kind == 'page':
+                    finished[page_numbers.pop(url)] = links
+                    while next_page in finished:
+                        for clean_url in finished.pop(next_page):
+                            if clean_url not in self.visited_urls:
+                                self.to_visit.append(clean_url)
+                        next_page += 1
+        finally:
+            for queue in tasks:
+                queue.put(None)
+            for process in processes:
+                process.join()
+
+        logger.info(f"Scraping complete! Scraped {pages_scraped} pages")
+        logger.info(f"Visited {len(self.visited_urls)} URLs")
+        logger.info(f"Downloaded {len(self.asset_urls)} assets")
+
+    def restore_remote_assets(self, page_path, asset_urls):
+        """Point a saved page's references to assets that failed to download back at the live site"""
+        remote_urls = {}
+        for asset_url in asset_urls:
+            local_path = self.get_asset_path(asset_url)
+            if not local_path.exists():  # Another URL may have saved the same file
+                remote_urls[local_url(local_path.relative_to(self.output_dir).as_posix())] = asset_url
+        if remote_urls:
+            restore_page_assets(str(self.output_dir / page_path), remote_urls)
+
+    def rewrite_links(self, workers=None):
+        """Point <a href> links at mirrored pages, in parallel, without fetching.
+
+        Every saved HTML file is re-parsed in a process pool and its in-site
+        links are resolved against the URL index. Links to pages that were
+        not mirrored are made absolute so they keep working.
+        """
+        pages = {}
+        for url, rel_path in self.url_index.items():
+            if rel_path.endswith('.html'):
+                pages.setdefault(rel_path, url)
+
+        logger.info(f"Rewriting links in {len(pages)} pages")
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_link_rewriter,
+                                 initargs=(self.url_index,)) as pool:
+            paths = [str(self.output_dir / rel_path) for rel_path in pages]
+            rewritten = sum(pool.map(rewrite_page_links, paths, pages.values(), chunksize=16))
+
+        logger.info(f"Rewrote links in {rewritten} pages")
+
+    def precompress(self, workers=None):
+        """Write .gz (and .br) siblings of the mirror's text files in a process pool.
+
+        Files whose SHA-256 matches the manifest from the last run keep their
+        siblings; siblings of files that are gone are removed. The manifest
+        records each file's size and compressed sizes and ratios.
+        """
+        manifest_path = self.output_dir / PRECOMPRESS_MANIFEST
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        sources = []
+        for directory, _, filenames in os.walk(self.output_dir):
+            for filename in filenames:
+                if filename.endswith(PRECOMPRESS_SUFFIXES) and filename not in (
+                        URL_INDEX_FILE, PRECOMPRESS_MANIFEST, CACHE_INDEX_FILE):
+                    sources.append(Path(directory, filename).relative_to(self.output_dir).as_posix())
+
+        if not BROTLI_AVAILABLE:
+            logger.warning("brotli is not installed (pip install brotli): writing .gz siblings only")
+        logger.info(f"Precompressing {len(sources)} text files")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = [str(self.output_dir / rel_path) for rel_path in sources]
+            entries = list(pool.map(precompress_file, paths, [manifest.get(rel_path) for rel_path in sources],
+                                    chunksize=16))
+
+        compressed = 0
+        for rel_path, entry in zip(sources, entries):
+            if entry is not None:
+                manifest[rel_path] = entry
+                compressed += 1
+        for rel_path in set(manifest) - set(sources):
+            for suffix in ('.gz', '.br'):
+                (self.output_dir / (rel_path + suffix)).unlink(missing_ok=True)
+            del manifest[rel_path]
+
+        tmp_path = manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        tmp_path.replace(manifest_path)
+
+        total = sum(entry['size'] for entry in manifest.values())
+        summary = [f"{len(sources) - compressed} unchanged"]
+        for suffix in ('gz', 'br'):
+            # Files whose sibling didn't pay off are served as-is
+            served = sum(entry.get(suffix) or entry['size'] for entry in manifest.values())
+            if any(suffix in entry for entry in manifest.values()):
+                summary.append(f"{suffix} {served / 1024:.0f} KB ({served / max(total, 1):.0%})")
+        logger.info(f"Precompressed {compressed} files, {total / 1024:.0f} KB: {', '.join(summary)}")
+
+    def enforce_cache_budget(self, budget):
+        """Record the files this crawl mirrored as just used, then evict LRU files past budget.
+
+        Everything in the URL index is pinned: the crawled pages and every
+        asset they reference, so no kept page loses its CSS, scripts or
+        srcset entries. Files only earlier crawls referenced are unpinned,
+        and go first, together with .gz/.br siblings.
+        """
+        cache = DiskCache(self.output_dir)
+        current = set()
+        for rel_path in self.url_index.values():
+            path = self.output_dir / rel_path
+            if not path.is_file():
+                continue
+            cache.record(path, pinned=True)
+            current.add(rel_path)
+            for suffix in ('.gz', '.br'):
+                sibling = path.with_name(path.name + suffix)
+                if sibling.is_file():
+                    cache.record(sibling)
+        for name in (URL_INDEX_FILE, PRECOMPRESS_MANIFEST):
+            if (self.output_dir / name).is_file():
+                cache.record(self.output_dir / name, pinned=True)  # In case a --scan adopted them
+                current.add(name)
+        for key in [key for key, entry in cache.entries.items() if entry[2] and key not in current]:
+            cache.pin(self.output_dir / key, False)  # No longer part of the mirrored site
+
+        evicted = cache.enforce(budget)
+        cache.save()
+        files, total, pinned = cache.usage()
+        logger.info(f"Disk cache: {files} files, {format_size(total)} ({format_size(pinned)} pinned) "
+                    f"of {format_size(budget)}; evicted {len(evicted)} files, "
+                    f"{format_size(sum(size for _, size in evicted))}")
+        if pinned > budget:
+            logger.warning("Disk cache: the crawled pages and their assets alone exceed the budget")
+
+
+def replace_file(path, data):
+    """Write str or bytes to path through a temporary file and a rename, never in place
+
+    A copy media_sync.py --link hardlinked into public/ keeps its content
+    until it is synced again instead of changing (or truncating) with the mirror.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def precompress_file(path, previous=None):
+    """Write path.gz/path.br at maximum compression; return its manifest entry, or None if unchanged
+
+    A sibling that is not smaller than the file is not kept (size 0 in the entry).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    compressors = {'gz': lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        compressors['br'] = lambda raw: brotli.compress(raw, quality=11, mode=brotli.MODE_TEXT)
+    if len(data) < PRECOMPRESS_MIN_SIZE:
+        compressors = {}
+
+    if previous is not None and previous['sha256'] == digest and all(
+            suffix in previous and (not previous[suffix] or os.path.exists(f"{path}.{suffix}"))
+            for suffix in compressors):
+        return None
+
+    entry = {'sha256': digest, 'size': len(data)}
+    for suffix in ('gz', 'br'):
+        # A sibling left from older content would be served in its place
+        if suffix not in compressors and os.path.exists(f"{path}.{suffix}"):
+            os.remove(f"{path}.{suffix}")
+    for suffix, compress in compressors.items():
+        sibling = f"{path}.{suffix}"
+        packed = compress(data)
+        if len(packed) < len(data):
+            with open(sibling + '.tmp', 'wb') as f:
+                f.write(packed)
+            os.replace(sibling + '.tmp', sibling)
+            entry[suffix] = len(packed)
+            entry[f'{suffix}_ratio'] = round(len(packed) / len(data), 4)
+        else:
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            entry[suffix] = 0
+    return entry
+
+
+def local_url(rel_path):
+    """Site URL for a file under OUTPUT_DIR ('us/p/index.html' -> '/renin/us/p/')"""
+    if rel_path == 'index.html' or rel_path.endswith('/index.html'):
+        rel_path = rel_path[:-len('index.html')]
+    return f"{SITE_ROOT}/{rel_path}"
+
+
+_link_index = None
+
+
+def init_link_rewriter(url_index):
+    """Pool initializer: ship the URL index to each rewriter process once"""
+    global _link_index
+    _link_index = url_index
+
+
+def rewrite_page_links(html_path, page_url):
+    """Rewrite one saved page's <a href> links; return True if the file changed"""
+    with open(html_path, encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    site = urlparse(BASE_URL).netloc
+    changed = False
+    for link in soup.find_all('a', {'href': True}):
+        href = link['href']
+        if href.startswith((SITE_ROOT + '/', '#', 'mailto:', 'tel:', 'javascript:')):
+            continue
+        parsed = urlparse(urljoin(page_url, href))
+        if parsed.netloc != site:
+            continue
+
+        rel_path = _link_index.get(f"{parsed.scheme}://{parsed.netloc}{parsed.path}")
+        new_href = local_url(rel_path) if rel_path else parsed.geturl()
+        if rel_path and parsed.fragment:
+            new_href += f"#{parsed.fragment}"
+        if new_href != href:
+            link['href'] = new_href
+            changed = True
+
+    if changed:
+        replace_file(html_path, str(soup))
+    return changed
+
+
+def restore_page_assets(html_path, remote_urls):
+    """Replace local asset URLs (keys of remote_urls) in one saved page; return True if it changed"""
+    with open(html_path, encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    changed = False
+    for tag, attribute in (('link', 'href'), ('script', 'src'), ('img', 'src')):
+        for element in soup.find_all(tag, {attribute: True}):
+            if element[attribute] in remote_urls:
+                element[attribute] = remote_urls[element[attribute]]
+                changed = True
+    for img in soup.find_all('img', {'srcset': True}):
+        parts = [part.split(maxsplit=1) for part in img['srcset'].split(',') if part.strip()]
+        if any(part[0] in remote_urls for part in parts):
+            img['srcset'] = ', '.join(' '.join([remote_urls.get(part[0], part[0]), *part[1:]]) for part in parts)
+            changed = True
+
+    if changed:
+        replace_file(html_path, str(soup))
+    return changed
+
+
+class SharedRateLimiter:
+    """Global request spacing shared by all worker processes"""
+
+    def __init__(self, max_per_second):
+        self.interval = 1.0 / max_per_second
+        self.next_slot = mp.Value('d', 0.0)
+
+    def wait(self):
+        with self.next_slot.get_lock():
+            slot = max(time.monotonic(), self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def shard_worker(tasks, results, rate_limiter, image_index_path=INDEX_PATH):
+    """Worker process: crawl pages and download assets routed to this shard"""
+    scraper = ReninScraper(image_index_path)
+    scraper.rate_limiter = rate_limiter
+    scraper.shard_worker = True
+
+    for kind, url in iter(tasks.get, None):
+        links, assets = [], []
+        saved_path = None
+        scraper.url_index.clear()
+        try:
+            if kind == 'page':
+                scraper.pending_assets = assets
+                links = scraper.crawl_page(url) or []
+                saved_path = scraper.url_index.get(url)
+            else:
+                local_path = scraper.download_asset(url)
+                if local_path is not None:
+                    saved_path = local_path.relative_to(scraper.output_dir).as_posix()
+        except Exception as e:
+            logger.error(f"Worker failed on {url}: {e}")
+        # Always report back so the coordinator's in-flight count drains
+        results.put((kind, url, links, assets, saved_path))
+
 
 def main():
-    scraper = ReninScraper()
-    scraper.run(max_pages=100)
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mirror renin.com for local hosting')
+    parser.add_argument('--max-pages', type=int, default=100,
+                        help='Maximum number of pages to crawl (default: 100)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes; above 1 shards the crawl by URL hash (default: 1)')
+    parser.add_argument('--max-rps', type=float, default=MAX_RPS,
+                        help=f'Global request rate limit for sharded runs (default: {MAX_RPS})')
+    parser.add_argument('--rewrite-only', action='store_true',
+                        help=f'Only rewrite links in an existing mirror using its {URL_INDEX_FILE}')
+    parser.add_argument('--precompress', action='store_true',
+                        help='Also write .gz/.br siblings of text files (skips files unchanged since the last run)')
+    parser.add_argument('--no-image-index', action='store_true',
+                        help=f'Do not reuse or record images in the shared index ({INDEX_PATH.name})')
+    parser.add_argument('--cache-budget', type=parse_size, metavar='SIZE',
+                        help='Keep the mirror under SIZE (e.g. 2G) by evicting the least recently used '
+                             'files earlier crawls left behind and .gz/.br siblings; the pages this crawl '
+                             'saved and everything they reference are kept')
+    args = parser.parse_args()
+
+    scraper = ReninScraper(None if args.no_image_index else INDEX_PATH)
+    if args.rewrite_only:
+        scraper.load_url_index()
+    elif args.workers > 1:
+        scraper.run_sharded(args.workers, max_pages=args.max_pages, max_rps=args.max_rps)
+        scraper.save_url_index()
+        scraper.image_index.save()
+    else:
+        scraper.run(max_pages=args.max_pages)
+        scraper.save_url_index()
+        scraper.image_index.save()
+    scraper.rewrite_links()
+    if args.precompress:
+        scraper.precompress()
+    if args.cache_budget:
+        scraper.enforce_cache_budget(args.cache_budget)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Renin page extraction helpers
+
+Pure functions that turn raw page HTML into product data. They take bytes
+or str and touch no network or scraper state, so the scrapers can run them
+in a ProcessPoolExecutor while their network threads keep fetching.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+# Renin's WooCommerce gallery containers, most specific first
+GALLERY_SELECTORS = [
+    '.woocommerce-product-gallery img',  # Main product gallery
+    '.product-images img',               # Alternative product images
+    '.flex-viewport img',                # FlexSlider images
+    'img[src*="wp-content/uploads"]',    # WordPress uploads
+]
+THUMBNAIL_MARKERS = ['thumbnail', '-100x100', '-150x150']
+UPLOAD_IMAGE_RE = re.compile(r'wp-content/uploads.*\.(jpg|jpeg|png|webp)', re.I)
+SIZE_SUFFIX_RE = re.compile(r'-\d+x\d+(\.(jpg|jpeg|png|webp))$', re.I)
+
+Html = Union[bytes, str]
+
+
+def parse_html(html: Html) -> BeautifulSoup:
+    """Parse raw page bytes/str (bytes let BeautifulSoup sniff the encoding)"""
+    return BeautifulSoup(html, 'html.parser')
+
+
+def clean_product_name(product_name: str) -> str:
+    """Filesystem-friendly product name: 'Augusta 1-Lite' -> 'Augusta-1-Lite'"""
+    clean_name = re.sub(r'[^\w\s-]', '', product_name)
+    return re.sub(r'[-\s]+', '-', clean_name).strip('-')
+
+
+def extract_gallery_images(html: Html, base_url: str) -> List[str]:
+    """Full-size product gallery image URLs from a rendered product page"""
+    soup = parse_html(html)
+    found_images = []
+    seen = set()
+
+    for selector in GALLERY_SELECTORS:
+        for img in soup.select(selector):
+            # Get image URL from src or data-src (lazy loading)
+            img_url = img.get('src') or img.get('data-src') or img.get('data-large_image')
+            if not img_url:
+                continue
+
+            # Handle relative URLs
+            if img_url.startswith('//'):
+                img_url = 'https:' + img_url
+            elif img_url.startswith('/'):
+                img_url = urljoin(base_url, img_url)
+
+            # Filter for actual product images (high quality)
+            if (img_url not in seen and
+                    'wp-content/uploads' in img_url and
+                    not any(exclude in img_url.lower() for exclude in THUMBNAIL_MARKERS)):
+                seen.add(img_url)
+                found_images.append(img_url)
+
+    return found_images
+
+
+def _to_price(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def _image_urls(value) -> List[str]:
+    """Flatten a schema.org image value (str, ImageObject or list of either)"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        url = value.get('url') or value.get('contentUrl')
+        return [url] if url else []
+    if isinstance(value, list):
+        return [url for item in value for url in _image_urls(item)]
+    return []
+
+
+def _json_ld_nodes(soup: BeautifulSoup):
+    """Every top-level or @graph node in the page's JSON-LD blocks"""
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for node in data if isinstance(data, list) else [data]:
+            if isinstance(node, dict):
+                yield node
+                for child in node.get('@graph', []):
+                    if isinstance(child, dict):
+                        yield child
+
+
+def extract_json_ld_product(soup: BeautifulSoup) -> Optional[Dict]:
+    """First schema.org Product block on the page, normalized"""
+    for node in _json_ld_nodes(soup):
+        node_type = node.get('@type')
+        if node_type != 'Product' and not (isinstance(node_type, list) and 'Product' in node_type):
+            continue
+
+        offers = node.get('offers') or []
+        if isinstance(offers, dict):
+            offers = [offers]
+        prices = []
+        currency = None
+        in_stock = None
+        for offer in offers:
+            for key in ('price', 'lowPrice', 'highPrice'):
+                price = _to_price(offer.get(key))
+                if price is not None:
+                    prices.append(price)
+            currency = currency or offer.get('priceCurrency')
+            availability = offer.get('availability')
+            if availability:
+                in_stock = bool(in_stock) or availability.endswith('InStock')
+
+        return {
+            'sku': node.get('sku'),
+            'name': node.get('name'),
+            'description': node.get('description'),
+            'prices': prices,
+            'currency': currency,
+            'inStock': in_stock,
+            'gallery': _image_urls(node.get('image')),
+        }
+    return None
+
+
+def extract_woocommerce_variations(soup: BeautifulSoup) -> List[Dict]:
+    """Variations from WooCommerce's data-product_variations attribute"""
+    form = soup.find('form', class_='variations_form')
+    raw = form.get('data-product_variations') if form else None
+    if not raw:
+        return []
+    try:
+        variations = json.loads(raw)
+    except ValueError:
+        return []
+    if not isinstance(variations, list):
+        # "false" when the store loads variations over AJAX
+        return []
+
+    results = []
+    for variation in variations:
+        image = variation.get('image') or {}
+        attributes = {
+            re.sub(r'^attribute_(pa_)?', '', key): value
+            for key, value in (variation.get('attributes') or {}).items()
+        }
+        results.append({
+            'id': variation.get('variation_id'),
+            'sku': variation.get('sku') or None,
+            'attributes': attributes,
+            'price': _to_price(variation.get('display_price')),
+            'regularPrice': _to_price(variation.get('display_regular_price')),
+            'inStock': variation.get('is_in_stock'),
+            'image': image.get('full_src') or image.get('url') or None,
+        })
+    return results
+
+
+def _unique(values) -> List:
+    """Drop empty and repeated values, keeping first-seen order"""
+    seen = set()
+    result = []
+    for value in values:
+        if value and value not in seen:
+            seen.add(value)
+            result.append(value)
+    return result
+
+
+def extract_catalogue_data(soup: BeautifulSoup) -> Dict:
+    """SKU, sizes, prices and gallery from JSON-LD and WooCommerce variation data"""
+    product = extract_json_ld_product(soup) or {}
+    variants = extract_woocommerce_variations(soup)
+
+    prices = product.get('prices', []) + [v['price'] for v in variants if v['price'] is not None]
+    sizes = [value for v in variants for key, value in v['attributes'].items() if 'size' in key]
+
+    return {
+        'sku': product.get('sku'),
+        'name': product.get('name'),
+        'description': product.get('description'),
+        'currency': product.get('currency'),
+        'inStock': product.get('inStock'),
+        'prices': sorted(set(prices)),
+        'sizes': _unique(sizes),
+        'gallery': _unique(product.get('gallery', []) + [v['image'] for v in variants]),
+        'variants': variants,
+    }
+
+
+def extract_product_page(html: Html, product_url: str, base_url: str) -> Dict:
+    """Product name, original-size upload images and catalogue data from a product page"""
+    soup = parse_html(html)
+
+    # Extract product name and code
+    title = soup.find('h1', class_='product_title')
+    product_name = title.get_text(strip=True) if title else "Unknown Product"
+
+    images = []
+    seen_urls = set()
+    for img in soup.find_all('img', src=UPLOAD_IMAGE_RE):
+        src = img.get('src')
+        if src and 'wp-content/uploads' in src:
+            # Remove size suffixes to get original image
+            img_url = SIZE_SUFFIX_RE.sub(r'\1', urljoin(base_url, src))
+            if img_url not in seen_urls:
+                seen_urls.add(img_url)
+                images.append({'url': img_url, 'alt': img.get('alt', '')})
+
+    return {
+        'name': product_name,
+        'clean_name': clean_product_name(product_name),
+        'slug': urlparse(product_url).path.rstrip('/').split('/')[-1],
+        'url': product_url,
+        'images': images,
+        'catalogue': extract_catalogue_data(soup),
+    }
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Compact URL bookkeeping for large crawls
+
+Keeps 64-bit URL fingerprints in a flat array instead of full URL strings.
+
+Memory per tracked URL:
+- set of str:          ~90-200 bytes (str object + set slot, grows with URL length)
+- URLFingerprintSet:   8 bytes per slot, load factor kept between 0.25 and 0.5,
+                       so 16-32 bytes per URL regardless of URL length
+- BloomFilter pre-check: bits_per_url / 8 extra bytes for each URL the array
+                       holds before it next grows (default 10 bits: 1.25-2.5 bytes)
+
+The Bloom filter only answers "definitely absent" early: every "maybe" is
+confirmed against the slot array, so it never changes an answer. It is
+rebuilt for the new capacity whenever the slot array grows, so its false
+positive rate stays near 1% however far a crawl outruns expected_items.
+
+Fingerprints are the first 8 bytes of blake2b. The chance of any collision among
+n URLs is about n^2 / 2^65 (~3e-6 at 10 million URLs); a collision only means a
+page is treated as already seen.
+
+Usage:
+    python url_fingerprints.py --measure 1000000
+"""
+
+import hashlib
+from array import array
+from typing import Iterable, Optional
+
+MIN_CAPACITY = 1024
+MAX_LOAD = 0.5
+EMPTY = 0
+
+
+def url_fingerprint(url: str) -> int:
+    """Return a non-zero 64-bit fingerprint for a URL"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over URL fingerprints (no false negatives)"""
+
+    __slots__ = ('bits_per_item', 'num_bits', 'num_hashes', 'bits')
+
+    def __init__(self, expected_items: int, bits_per_item: int = 10):
+        self.bits_per_item = bits_per_item
+        self.num_bits = max(64, expected_items * bits_per_item)
+        # k = ln(2) * bits/item is optimal; 10 bits/item -> 7 hashes, ~1% false positives
+        self.num_hashes = max(1, round(bits_per_item * 0.693))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, fingerprint: int):
+        # Double hashing (Kirsch-Mitzenmacher) from the two 32-bit halves
+        h1 = fingerprint & 0xFFFFFFFF
+        h2 = (fingerprint >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, fingerprint: int):
+        for pos in self._positions(fingerprint):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, fingerprint: int) -> bool:
+        for pos in self._positions(fingerprint):
+            if not self.bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+
+class URLFingerprintSet:
+    """Set-like container of URLs stored as 64-bit fingerprints.
+
+    Supports ``add``, ``in`` and ``len`` like a set of URLs, but cannot
+    give the URLs back. Open addressing with linear probing over an
+    ``array('Q')``; slot value 0 marks an empty slot.
+    """
+
+    __slots__ = ('_slots', '_mask', '_count', '_bloom')
+
+    def __init__(self, urls: Iterable[str] = (), expected_items: int = 0,
+                 bloom_bits_per_item: Optional[int] = None):
+        capacity = MIN_CAPACITY
+        while capacity * MAX_LOAD < expected_items:
+            capacity *= 2
+        self._slots = array('Q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._count = 0
+        self._bloom = None
+        if bloom_bits_per_item:
+            self._bloom = BloomFilter(max(expected_items, MIN_CAPACITY), bloom_bits_per_item)
+        for url in urls:
+            self.add(url)
+
+    def _find(self, fingerprint: int) -> int:
+        """Return the slot index holding fingerprint, or the empty slot where it belongs"""
+        slots = self._slots
+        mask = self._mask
+        i = fingerprint & mask
+        while True:
+            value = slots[i]
+            if value == fingerprint or value == EMPTY:
+                return i
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(8 * len(old) * 2))
+        self._mask = len(self._slots) - 1
+        if self._bloom is not None:
+            # Sized for every item the new array takes before growing again
+            self._bloom = BloomFilter(int(len(self._slots) * MAX_LOAD), self._bloom.bits_per_item)
+        for value in old:
+            if value != EMPTY:
+                self._slots[self._find(value)] = value
+                if self._bloom is not None:
+                    self._bloom.add(value)
+
+    def add(self, url: str) -> bool:
+        """Add a URL; return True if it was not already present"""
+        fingerprint = url_fingerprint(url)
+        i = self._find(fingerprint)
+        if self._slots[i] == fingerprint:
+            return False
+        self._slots[i] = fingerprint
+        self._count += 1
+        if self._bloom is not None:
+            self._bloom.add(fingerprint)
+        if self._count > len(self._slots) * MAX_LOAD:
+            self._grow()
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        fingerprint = url_fingerprint(url)
+        if self._bloom is not None and not self._bloom.might_contain(fingerprint):
+            return False
+        # A Bloom "maybe" is only a hint; the slot array decides
+        return self._slots[self._find(fingerprint)] == fingerprint
+
+    def __len__(self) -> int:
+        return self._count
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the slot array and optional Bloom filter"""
+        total = self._slots.itemsize * len(self._slots)
+        if self._bloom is not None:
+            total += self._bloom.memory_bytes()
+        return total
+
+
+def measure(count: int):
+    """Compare memory of a set of URL strings against URLFingerprintSet"""
+    import tracemalloc
+
+    urls = (f"https://www.renin.com/us/products/door-{i}/?variant={i * 7}" for i in range(count))
+
+    tracemalloc.start()
+    plain = set(urls)
+    plain_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    compact = URLFingerprintSet(expected_items=count)
+    for url in plain:
+        compact.add(url)
+    missing = sum(1 for url in plain if url not in compact)
+
+    print(f"URLs tracked: {count:,} (missing after insert: {missing})")
+    print(f"set[str]:          {plain_bytes / count:6.1f} bytes/URL")
+    print(f"URLFingerprintSet: {compact.memory_bytes() / count:6.1f} bytes/URL")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measure URL bookkeeping memory')
+    parser.add_argument('--measure', type=int, default=1_000_000,
+                        help='Number of synthetic URLs to track (default: 1000000)')
+    args = parser.parse_args()
+    measure(args.measure)
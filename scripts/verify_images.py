@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Integrity check for the scraped image corpus
+
+Hashes every image under the given roots in a thread pool over mmap'd files
+(hashlib releases the GIL while it hashes, so the threads run in parallel
+and the disk sets the pace), checks that each file starts with a readable
+image header and still ends in its format's end marker, and compares size,
+SHA-256 and dimensions with the manifest saved by the last --update.
+
+Flags corrupt files (not an image, e.g. a saved error page; no dimensions;
+truncated), files that changed since the manifest, and files that went
+missing. Exits 1 if it found any.
+
+Usage:
+    python scripts/verify_images.py --update          # record the current files as the baseline
+    python scripts/verify_images.py                   # renin_images, public/renin, public/images
+    python scripts/verify_images.py public/images --jobs 16 --quick
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from image_probe import MAX_BYTES, image_dimensions, sniff_format
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROOTS = [REPO_ROOT / 'renin_images', REPO_ROOT / 'public' / 'renin', REPO_ROOT / 'public' / 'images']
+MANIFEST_PATH = REPO_ROOT / '.scraper-cache' / 'image-manifest.json'
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg')
+HASH_ONLY_SUFFIXES = ('.avif', '.svg')  # No cheap structural check for these
+TAIL_BYTES = 4096
+# Must appear in the last TAIL_BYTES (a little trailing padding is common)
+END_MARKERS = {'jpeg': b'\xff\xd9', 'png': b'IEND\xaeB`\x82'}
+
+
+class FileCheck(NamedTuple):
+    key: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    width: Optional[int]
+    height: Optional[int]
+    problem: Optional[str]
+
+
+def image_problem(data, suffix: str) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    """(what is wrong or None, dimensions) from an image's first and last bytes"""
+    if suffix in HASH_ONLY_SUFFIXES:
+        return None, None
+    head = data[:4096]
+    image_format = sniff_format(head)
+    if image_format is None:
+        return f"not an image (starts with {bytes(head[:16])!r})", None
+
+    size = image_dimensions(head)
+    if size is None and image_format == 'jpeg':
+        size = image_dimensions(data[:MAX_BYTES])  # Size marker behind EXIF/ICC data
+    if not size or not all(size):
+        return f"no readable {image_format} dimensions", None
+
+    tail = data[-TAIL_BYTES:]
+    if image_format in END_MARKERS and END_MARKERS[image_format] not in tail:
+        return f"truncated (no {image_format} end marker)", size
+    if image_format == 'gif' and not tail.rstrip(b'\0').endswith(b';'):
+        return "truncated (no gif trailer)", size
+    if image_format == 'webp':
+        declared = int.from_bytes(head[4:8], 'little') + 8
+        if declared > len(data):
+            return f"truncated ({len(data)} of {declared} bytes)", size
+    return None, size
+
+
+def check_file(path: str, key: str, trusted: Optional[List] = None) -> FileCheck:
+    """Hash and structure-check one file; trusted is its manifest entry when --quick may reuse the hash"""
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        if stat.st_size == 0:
+            return FileCheck(key, 0, stat.st_mtime_ns, hashlib.sha256().hexdigest(), None, None, "empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if trusted and trusted[0] == stat.st_size and trusted[1] == stat.st_mtime_ns:
+                digest = trusted[2]
+            else:
+                digest = hashlib.sha256(data).hexdigest()
+            problem, size = image_problem(data, os.path.splitext(path)[1].lower())
+    return FileCheck(key, stat.st_size, stat.st_mtime_ns, digest, *(size or (None, None)), problem)
+
+
+def manifest_key(path: Path) -> str:
+    """Repo-relative path where possible, so the manifest survives moving the checkout"""
+    path = path.resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def find_images(roots: List[Path]) -> Dict[str, str]:
+    """Manifest key -> path for every image file under roots"""
+    files = {}
+    for root in roots:
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for filename in filenames:
+                if filename.lower().endswith(IMAGE_SUFFIXES):
+                    path = os.path.join(directory, filename)
+                    files[manifest_key(Path(path))] = path
+    return files
+
+
+def load_manifest(path: Path) -> Dict[str, List]:
+    """Key -> [size, mtime_ns, sha256, width, height]"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['files']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_manifest(path: Path, files: Dict[str, List]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'files': files}, f, indent=0, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def verify(roots: List[Path], manifest_path: Path = MANIFEST_PATH, jobs: Optional[int] = None,
+           quick: bool = False, update: bool = False, show: int = 20) -> bool:
+    """Check every image under roots against the manifest; return True if nothing is wrong"""
+    manifest = load_manifest(manifest_path)
+    files = find_images(roots)
+    prefixes = tuple(manifest_key(root).rstrip('/') + '/' for root in roots)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        trusted = [manifest.get(key) if quick else None for key in files]
+        results = list(pool.map(check_file, files.values(), files.keys(), trusted))
+    elapsed = time.perf_counter() - start
+
+    corrupt, changed, new = [], [], []
+    for result in results:
+        entry = manifest.get(result.key)
+        if result.problem:
+            corrupt.append(f"{result.key}: {result.problem}")
+        elif entry is None:
+            new.append(result.key)
+        elif [result.size, result.sha256, result.width, result.height] != [entry[0], *entry[2:]]:
+            changed.append(f"{result.key}: {entry[0]} -> {result.size} bytes"
+                           + ("" if entry[3:] == [result.width, result.height]
+                              else f", {entry[3]}x{entry[4]} -> {result.width}x{result.height}"))
+    missing = sorted(key for key in manifest if key.startswith(prefixes) and key not in files)
+
+    total_mb = sum(result.size for result in results) / (1024 * 1024)
+    print(f"🔍 Verified {len(results)} files, {total_mb:.1f} MB in {elapsed:.2f}s "
+          f"({total_mb / max(elapsed, 1e-9):.0f} MB/s{', hashes reused where unchanged' if quick else ''})")
+    for label, items in (("❌ Corrupt", corrupt), ("⚠️  Changed", changed), ("❓ Missing", missing), ("🆕 New", new)):
+        if items:
+            print(f"{label}: {len(items)}")
+            for item in sorted(items)[:show]:
+                print(f"    {item}")
+            if len(items) > show:
+                print(f"    ... and {len(items) - show} more")
+
+    if update:
+        for result in results:
+            if not result.problem:  # Corrupt files never become the baseline
+                manifest[result.key] = [result.size, result.mtime_ns, result.sha256, result.width, result.height]
+        for key in missing:
+            del manifest[key]
+        save_manifest(manifest_path, manifest)
+        print(f"💾 Manifest updated: {len(manifest)} files ({manifest_path})")
+        return not corrupt
+
+    if not corrupt and not changed and not missing:
+        print("✅ All files intact")
+    return not (corrupt or changed or missing)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Verify scraped images against a checksum manifest')
+    parser.add_argument('roots', nargs='*', type=Path,
+                        help='Directories to check (default: renin_images, public/renin, public/images)')
+    parser.add_argument('--manifest', '-m', type=Path, default=MANIFEST_PATH,
+                        help='Manifest file (default: .scraper-cache/image-manifest.json)')
+    parser.add_argument('--update', '-u', action='store_true',
+                        help='Record the current files as the new baseline (corrupt ones excluded)')
+    parser.add_argument('--quick', '-q', action='store_true',
+                        help='Reuse the manifest hash for files whose size and mtime are unchanged')
+    parser.add_argument('--jobs', '-j', type=int, help='Hashing threads (default: 4 per core, max 32)')
+    parser.add_argument('--show', type=int, default=20, help='Files listed per category (default: 20)')
+    args = parser.parse_args()
+
+    roots = [root for root in (args.roots or DEFAULT_ROOTS) if root.is_dir()]
+    if not roots:
+        print("❌ None of the directories exist")
+        sys.exit(1)
+    ok = verify(roots, args.manifest, args.jobs, args.quick, args.update, args.show)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()